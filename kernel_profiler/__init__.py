@@ -1 +1,2 @@
 from kernel_profiler.version import __version__  # NOQA
+from kernel_profiler.api import iter_competition, profile_competition  # NOQA
@@ -0,0 +1,87 @@
+from kernel_profiler.metrics import Metrics
+from kernel_profiler.pipeline import imap_ordered
+from kernel_profiler.scraper import (
+    TOP_URL,
+    extract_page_commits,
+    iter_kernels,
+    open_kernel,
+    open_kernel_list,
+)
+
+
+def iter_competition(
+    comp_slug,
+    max_num_kernels=20,
+    max_pages_per_driver=0,
+    max_driver_memory=0,
+    driver_options=None,
+    base_url=TOP_URL,
+    num_workers=2,
+    extract_mode="html",
+    metrics=None,
+    create_driver=None,
+    load_kernel_list=open_kernel_list,
+    load_kernel=open_kernel,
+):
+    """
+    Profile top scoring public kernels of a competition and yield each kernel
+    (a `kernel_profiler.records.Kernel` with its `commits` filled in) as soon
+    as it finishes. `driver_options` are passed to
+    `kernel_profiler.driver.create_chrome_driver`. `base_url` can point to a
+    stand-in server (see `kernel_profiler.testing.server`) instead of Kaggle.
+
+    Kernel pages are loaded by the browser in a background thread while
+    `num_workers` threads parse the pages loaded before and fetch their version
+    pages, so the browser doesn't sit idle. Kernels are still yielded in the
+    order of the competition listing. `num_workers=0` does everything in the
+    calling thread (and is the only mode that shows a progress bar for the
+    versions of each kernel).
+
+    With `extract_mode="script"`, the listing cards and version rows are
+    extracted by JavaScript in the browser and only those fields are
+    transferred, instead of the whole page source.
+
+    Pass a `kernel_profiler.metrics.Metrics` as `metrics` to record how the
+    run goes (stage durations, requests, skipped commits, browser errors).
+
+    `create_driver`, `load_kernel_list` and `load_kernel` are passed to
+    `kernel_profiler.scraper.iter_kernels` to replace the browser (see
+    `kernel_profiler.testing.load_test`).
+
+    Nothing is written to disk. Use `kernel_profiler.render` to render the
+    kernels as markdown.
+    """
+    metrics = metrics or Metrics(competition=comp_slug)
+    base_url = base_url.rstrip("/")
+    kernels = iter_kernels(
+        comp_slug,
+        max_num_kernels,
+        max_pages_per_driver=max_pages_per_driver,
+        max_driver_memory=max_driver_memory,
+        driver_options=driver_options,
+        base_url=base_url,
+        extract_mode=extract_mode,
+        metrics=metrics,
+        create_driver=create_driver,
+        load_kernel_list=load_kernel_list,
+        load_kernel=load_kernel,
+    )
+
+    def process(page):
+        kernel_page, kernel = page
+        with metrics.time("stage_duration_seconds", stage="parse"):
+            kernel.commits = extract_page_commits(
+                kernel_page, base_url, metrics, progress=num_workers == 0
+            )
+
+        metrics.inc("kernels")
+        return kernel
+
+    yield from imap_ordered(process, kernels, num_workers=num_workers)
+
+
+def profile_competition(comp_slug, **kwargs):
+    """
+    Same as `iter_competition`, but return all the kernels as a list.
+    """
+    return list(iter_competition(comp_slug, **kwargs))
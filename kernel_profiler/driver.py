@@ -0,0 +1,285 @@
+import os
+
+import psutil
+import urllib3
+from selenium import webdriver
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+from kernel_profiler.metrics import Metrics
+
+
+# Messages (in lower case) of the errors raised when the browser (or its tab) is gone.
+CRASH_MESSAGES = [
+    "tab crashed",
+    "chrome not reachable",
+    "session deleted because of page crash",
+    "disconnected: not connected to devtools",
+]
+
+# Errors raised when chromedriver itself is gone and can't be connected to.
+CONNECTION_ERRORS = (urllib3.exceptions.HTTPError, ConnectionError)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_6) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/79.0.3945.117 Safari/537.36"
+)
+WINDOW_SIZE = (1920, 1080)
+
+
+def create_chrome_driver(
+    user_data_dir=None, disk_cache_dir=None, debugger_address=None
+):
+    """
+    Create a headless Chrome driver.
+
+    Parameters
+    ----------
+    user_data_dir : str, optional
+        Profile directory to reuse across runs. Chrome keeps its HTTP cache in the
+        profile, so Kaggle's scripts and stylesheets are only downloaded once.
+    disk_cache_dir : str, optional
+        Directory for the HTTP cache, if it should live outside the profile.
+    debugger_address : str, optional
+        Address (e.g. "127.0.0.1:9222") of an already running Chrome started with
+        `--remote-debugging-port`. The driver attaches to it instead of launching
+        a new browser, so the other options are ignored. The user agent and the
+        window size are applied to the attached browser over the DevTools
+        protocol.
+
+    """
+    options = Options()
+
+    if debugger_address is not None:
+        options.debugger_address = debugger_address
+    else:
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("window-size={}x{}".format(*WINDOW_SIZE))
+        options.add_argument(f"--user-agent={USER_AGENT}")
+
+        if user_data_dir is not None:
+            options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+
+        if disk_cache_dir is not None:
+            options.add_argument(f"--disk-cache-dir={os.path.abspath(disk_cache_dir)}")
+
+    if os.path.exists("./chromedriver"):
+        driver = webdriver.Chrome("./chromedriver", options=options)
+    else:
+        driver = webdriver.Chrome(options=options)
+
+    if debugger_address is not None:
+        # The browser was started without the arguments above (e.g. a headless
+        # Chrome would send "HeadlessChrome" as its user agent), so apply them now.
+        driver.execute_cdp_cmd(
+            "Network.setUserAgentOverride", {"userAgent": USER_AGENT}
+        )
+        driver.set_window_size(*WINDOW_SIZE)
+
+    return driver
+
+
+def get_process_memory(proc):
+    """
+    Return the memory used by a process in bytes. Chrome's processes share
+    libraries and memory, so summing their RSS counts the shared pages once per
+    process. Use the proportional set size (Linux) or the unique set size where
+    available, and fall back to RSS.
+    """
+    try:
+        info = proc.memory_full_info()
+    except psutil.AccessDenied:
+        info = proc.memory_info()
+
+    for field in ["pss", "uss", "rss"]:
+        if hasattr(info, field):
+            return getattr(info, field)
+
+
+def get_process_tree_memory(pid):
+    """
+    Return the total memory (see `get_process_memory`) used by a process and its
+    descendants in bytes.
+
+    Examples
+    --------
+    >>> get_process_tree_memory(os.getpid()) > 0
+    True
+
+    >>> get_process_tree_memory(-1)
+    0
+
+    """
+    try:
+        proc = psutil.Process(pid)
+        procs = [proc, *proc.children(recursive=True)]
+    except (psutil.NoSuchProcess, ValueError):
+        return 0
+
+    memory = 0
+    for p in procs:
+        try:
+            memory += get_process_memory(p)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # The process exited or is not ours to inspect.
+            pass
+    return memory
+
+
+def is_browser_crash(e):
+    """
+    Return True if an error raised by the driver means the browser (or
+    chromedriver) crashed, in which case the driver can't be used anymore.
+
+    Examples
+    --------
+    >>> from selenium.common.exceptions import TimeoutException
+    >>>
+    >>> is_browser_crash(WebDriverException("unknown error: tab crashed"))
+    True
+    >>> is_browser_crash(InvalidSessionIdException("invalid session id"))
+    True
+    >>> is_browser_crash(ConnectionRefusedError())
+    True
+    >>> is_browser_crash(TimeoutException())
+    False
+
+    """
+    if isinstance(e, (InvalidSessionIdException, *CONNECTION_ERRORS)):
+        return True
+
+    if not isinstance(e, WebDriverException):
+        return False
+
+    message = (e.msg or "").lower()
+    return any(m in message for m in CRASH_MESSAGES)
+
+
+class DriverManager:
+    """
+    Keep a driver alive across many page loads and recycle it when it gets heavy.
+
+    The driver is restarted after `max_pages` page loads, when the memory used by
+    chromedriver and the browser processes it spawned exceeds `max_memory_mb`,
+    or when the browser crashes. `0` disables the corresponding limit.
+
+    When the driver is attached to an already running browser (see
+    `create_chrome_driver`), the browser is not a child of chromedriver and a
+    restart attaches to the same browser again, so the limits don't help there
+    (`kernel_profiler.scraper.iter_kernels` rejects them).
+
+    Examples
+    --------
+    >>> class FakeDriver:
+    ...     def quit(self):
+    ...         pass
+    >>>
+    >>> manager = DriverManager(FakeDriver, max_pages=2)
+    >>> drivers = [manager.run(lambda driver: driver) for _ in range(3)]
+    Restarting the driver (loaded 2 pages)
+    >>> drivers[0] is drivers[1]
+    True
+    >>> drivers[1] is drivers[2]
+    False
+    >>> manager.quit()
+
+    """
+
+    def __init__(
+        self,
+        create_driver=create_chrome_driver,
+        max_pages=0,
+        max_memory_mb=0,
+        max_retries=2,
+        metrics=None,
+    ):
+        self.create_driver = create_driver
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.max_retries = max_retries
+        self.metrics = metrics or Metrics()
+        self.num_restarts = 0
+        self._driver = None
+        self._num_pages = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.quit()
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = self.create_driver()
+            self._num_pages = 0
+        return self._driver
+
+    def quit(self):
+        if self._driver is None:
+            return
+
+        try:
+            self._driver.quit()
+        except (WebDriverException, *CONNECTION_ERRORS):
+            # The browser is already gone (e.g. it crashed).
+            pass
+        finally:
+            self._driver = None
+
+    def restart(self, reason, kind):
+        print(f"Restarting the driver ({reason})")
+        self.quit()
+        self.num_restarts += 1
+        self.metrics.inc("driver_restarts", reason=kind)
+
+    def memory_usage(self):
+        """
+        Return the memory used by the driver and its browser processes in bytes.
+        """
+        try:
+            pid = self._driver.service.process.pid
+        except AttributeError:
+            return 0
+        return get_process_tree_memory(pid)
+
+    def recycle_reason(self):
+        """
+        Return why the driver should be restarted and the kind of the reason,
+        or None if it shouldn't.
+        """
+        if self._driver is None:
+            return
+
+        if self.max_pages > 0 and self._num_pages >= self.max_pages:
+            return f"loaded {self._num_pages} pages", "max_pages"
+
+        if self.max_memory_mb > 0:
+            memory_mb = self.memory_usage() / 1024 ** 2
+            if memory_mb > self.max_memory_mb:
+                return f"using {memory_mb:.0f} MB", "max_memory"
+
+    def run(self, func):
+        """
+        Call `func(driver)` and return its result. If the browser crashes (see
+        `is_browser_crash`), restart it and call `func` again with a fresh
+        driver, up to `max_retries` times. Other errors (e.g. `TimeoutException`
+        when `WebDriverWait` gives up) are raised as is.
+        """
+        reason = self.recycle_reason()
+        if reason is not None:
+            self.restart(*reason)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = func(self.driver)
+                self._num_pages += 1
+                return result
+            except (WebDriverException, *CONNECTION_ERRORS) as e:
+                self.metrics.inc("page_errors", error=type(e).__name__)
+                if not is_browser_crash(e) or attempt == self.max_retries:
+                    raise
+                self.restart(f"{type(e).__name__}: {str(e).strip()}", "crash")
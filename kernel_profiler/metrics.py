@@ -0,0 +1,263 @@
+"""
+Run metrics in the Prometheus text format, which can be written to a file for the
+node-exporter textfile collector or served on a local `/metrics` endpoint (in the
+OpenMetrics format if the scraper asks for it).
+"""
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PREFIX = "kernel_profiler_"
+
+# Name -> (type, help)
+METRICS = {
+    "stage_duration_seconds": (
+        "summary",
+        "Time spent in each stage (fetch: loading pages in the browser, "
+        "parse: extracting commits including version page requests, "
+        "render: rendering markdown, write: writing the output files).",
+    ),
+    "kernels": ("counter", "Kernels profiled."),
+    "version_requests": ("counter", "Version page requests by HTTP status."),
+    "version_scores": (
+        "counter",
+        "Version scores by source (embedded: read from the kernel page, "
+        "fetched: requested from the version page).",
+    ),
+    "commits_skipped": (
+        "counter",
+        "Commits left out of the profile by reason (no_link, failed, no_score, "
+        "request_failed: the version page could not be fetched).",
+    ),
+    "page_errors": ("counter", "Errors raised while loading pages in the browser."),
+    "version_score_cache_hit_ratio": (
+        "gauge",
+        "Share of version scores read from the kernel page instead of fetched.",
+    ),
+    "driver_restarts": ("counter", "Browser restarts by reason."),
+    "run_duration_seconds": ("gauge", "Duration of the last run."),
+    "last_run_timestamp_seconds": ("gauge", "Time the last run finished."),
+    "last_run_success": ("gauge", "Whether the last run succeeded."),
+}
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def format_labels(labels):
+    """
+    Examples
+    --------
+    >>> format_labels({"a": "b", "c": 'd"e'})
+    '{a="b",c="d\\\\"e"}'
+
+    >>> format_labels({})
+    ''
+
+    """
+    if len(labels) == 0:
+        return ""
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def format_value(value):
+    """
+    Examples
+    --------
+    >>> format_value(1)
+    '1'
+
+    >>> format_value(0.5)
+    '0.5'
+
+    """
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def derive_cache_hit_ratio(values):
+    """
+    Compute `version_score_cache_hit_ratio` from the `version_scores` counters,
+    so that it is always consistent with them.
+
+    Examples
+    --------
+    >>> values = {
+    ...     ("version_scores", (("source", "embedded"),)): 3,
+    ...     ("version_scores", (("source", "fetched"),)): 1,
+    ... }
+    >>> derive_cache_hit_ratio(values)
+    {('version_score_cache_hit_ratio', ()): 0.75}
+
+    """
+    counts = {}
+    for (name, labels), value in values.items():
+        if name != "version_scores":
+            continue
+
+        labels = dict(labels)
+        source = labels.pop("source", None)
+        key = tuple(sorted(labels.items()))
+        embedded, total = counts.get(key, (0, 0))
+        counts[key] = (embedded + (value if source == "embedded" else 0), total + value)
+
+    return {
+        ("version_score_cache_hit_ratio", labels): embedded / total
+        for labels, (embedded, total) in counts.items()
+        if total > 0
+    }
+
+
+class Metrics:
+    """
+    A thread-safe collection of metrics. `labels` (e.g. the competition) are
+    attached to every sample.
+
+    Examples
+    --------
+    >>> metrics = Metrics(competition="titanic")
+    >>> metrics.inc("version_requests", status=200)
+    >>> metrics.inc("version_requests", status=200)
+    >>> metrics.observe("stage_duration_seconds", 0.5, stage="parse")
+    >>> print(metrics.render())  # doctest: +ELLIPSIS
+    # HELP kernel_profiler_stage_duration_seconds Time spent in each stage ...
+    # TYPE kernel_profiler_stage_duration_seconds summary
+    kernel_profiler_stage_duration_seconds_count{competition="titanic",stage="parse"} 1
+    kernel_profiler_stage_duration_seconds_sum{competition="titanic",stage="parse"} 0.5
+    # HELP kernel_profiler_version_requests_total Version page requests by HTTP status.
+    # TYPE kernel_profiler_version_requests_total counter
+    kernel_profiler_version_requests_total{competition="titanic",status="200"} 2
+    <BLANKLINE>
+
+    """
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, name, labels):
+        if name not in METRICS:
+            raise KeyError(f"Unknown metric: {name}")
+        return name, tuple(sorted({**self.labels, **labels}.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            count, total = self._values.get(key, (0, 0.0))
+            self._values[key] = (count + 1, total + value)
+
+    def get(self, name, default=None, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            return self._values.get(key, default)
+
+    @contextlib.contextmanager
+    def time(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self, openmetrics=False):
+        """
+        Render the metrics in the Prometheus text format, or in the OpenMetrics
+        format if `openmetrics` is True.
+        """
+        with self._lock:
+            values = dict(self._values)
+            values.update(derive_cache_hit_ratio(values))
+
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            samples = sorted((k[1], v) for k, v in values.items() if k[0] == name)
+            if len(samples) == 0:
+                continue
+
+            family = PREFIX + name
+            # In the Prometheus format the `_total` suffix is part of the name of
+            # a counter. In OpenMetrics, it's only added to the samples.
+            if metric_type == "counter" and not openmetrics:
+                family += "_total"
+
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {metric_type}")
+
+            for labels, value in samples:
+                labels = format_labels(dict(labels))
+                if metric_type == "summary":
+                    count, total = value
+                    lines.append(f"{family}_count{labels} {count}")
+                    lines.append(f"{family}_sum{labels} {format_value(total)}")
+                elif metric_type == "counter" and openmetrics:
+                    lines.append(f"{family}_total{labels} {format_value(value)}")
+                else:
+                    lines.append(f"{family}{labels} {format_value(value)}")
+
+        if openmetrics:
+            lines.append("# EOF")
+
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(metrics, path):
+    """
+    Write the metrics for the node-exporter textfile collector. The file is
+    replaced atomically so the collector never reads a partial file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(metrics.render())
+    os.replace(tmp_path, path)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        content = self.server.metrics.render(openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header(
+            "Content-Type",
+            OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE,
+        )
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(metrics, port, host="127.0.0.1"):
+    """
+    Serve the metrics on `http://<host>:<port>/metrics` from a background thread.
+    Returns the server so that it can be shut down.
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,103 @@
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+_DONE = object()
+
+
+def _close(it):
+    # Release resources held by an iterator (e.g. quit the driver of a generator).
+    close = getattr(it, "close", None)
+    if close is not None:
+        close()
+
+
+def imap_ordered(func, iterable, num_workers=1, max_pending=None):
+    """
+    Like `map(func, iterable)`, but `iterable` is consumed in a background thread and
+    `func` runs on a pool of `num_workers` threads, so producing an item overlaps with
+    processing the previous ones and with consuming their results. Results are
+    yielded in the order of `iterable`. At most `max_pending` (default:
+    `2 * num_workers`) items are produced ahead of the consumer.
+
+    `iterable` is only ever advanced from a single thread, so it can drive a
+    Selenium driver. `num_workers=0` processes the items sequentially in the
+    calling thread.
+
+    Examples
+    --------
+    >>> list(imap_ordered(lambda x: x * 2, range(5), num_workers=2))
+    [0, 2, 4, 6, 8]
+
+    >>> list(imap_ordered(lambda x: x * 2, range(5), num_workers=0))
+    [0, 2, 4, 6, 8]
+
+    """
+    if num_workers == 0:
+        it = iter(iterable)
+        try:
+            for item in it:
+                yield func(item)
+        finally:
+            _close(it)
+        return
+
+    max_pending = max_pending or 2 * num_workers
+    slots = threading.Semaphore(max_pending)
+    futures = queue.Queue()
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(num_workers)
+
+    def produce():
+        it = iter(iterable)
+        try:
+            while True:
+                # Wait until the consumer catches up.
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+
+                if stop.is_set():
+                    return
+
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+
+                futures.put(executor.submit(func, item))
+        except BaseException as e:
+            # Hand the error over to the consumer.
+            failed = Future()
+            failed.set_exception(e)
+            futures.put(failed)
+        finally:
+            # Close the iterable from the thread that has been advancing it.
+            _close(it)
+            futures.put(_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            future = futures.get()
+            if future is _DONE:
+                break
+
+            try:
+                yield future.result()
+            finally:
+                slots.release()
+    finally:
+        stop.set()
+        producer.join()
+
+        # Don't process items nobody is waiting for anymore.
+        while not futures.empty():
+            future = futures.get_nowait()
+            if future is not _DONE:
+                future.cancel()
+
+        executor.shutdown(wait=True)
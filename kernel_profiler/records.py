@@ -0,0 +1,83 @@
+class Record:
+    """
+    Base class for lightweight records. Subclasses list their fields in `__slots__`.
+
+    Examples
+    --------
+    >>> class Point(Record):
+    ...     __slots__ = ("x", "y")
+    >>>
+    >>> Point(x=1, y=2)
+    Point(x=1, y=2)
+
+    >>> Point(x=1, y=2) == Point(x=1, y=2)
+    True
+
+    >>> Point(x=1, y=2).as_dict()
+    {'x': 1, 'y': 2}
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+
+        if len(fields) > 0:
+            raise TypeError(
+                "{} got unexpected fields: {}".format(
+                    type(self).__name__, ", ".join(fields)
+                )
+            )
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.as_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Commit(Record):
+    """
+    A scored version of a kernel.
+    """
+
+    __slots__ = (
+        "version",
+        "score",
+        "committed_at",
+        "run_time",
+        "added",
+        "deleted",
+        "url",
+    )
+
+
+class Kernel(Record):
+    """
+    A kernel on a competition leaderboard and its commit history.
+    """
+
+    __slots__ = (
+        "name",
+        "url",
+        "author_name",
+        "author_id",
+        "author_url",
+        "thumbnail_src",
+        "tier_src",
+        "votes",
+        "comments",
+        "last_updated",
+        "best_score",
+        "language",
+        "medal_src",
+        "commits",
+    )
@@ -0,0 +1,153 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+from premailer import transform
+
+from kernel_profiler import markdown as md, html, utils
+
+
+DESCRIPTION = """
+## My GitHub repository: [harupy/kernel-profiler][kernel-profiler] automatically updates this notebook by using [GitHub Actions][actions] and [Kaggle API][kaggle-api]. Any feedback would be appreciated.
+
+[kernel-profiler]: https://github.com/harupy/kernel-profiler
+[actions]: https://github.com/features/actions
+[kaggle-api]: https://github.com/Kaggle/kaggle-api
+""".strip()  # NOQA
+
+COMMIT_HEADERS = [
+    "Version",
+    "Score",
+    "Committed at",
+    "Run Time",
+    "Added",
+    "Deleted",
+    "Link",
+]
+
+
+def format_kernel_metadata(kernel):
+    author_link = md.make_link(kernel.author_name, kernel.author_url)
+
+    if kernel.medal_src != "":
+        attrs = {
+            "alt": "medal",
+            "src": kernel.medal_src,
+            "align": "left",
+        }
+        medal_img = html.make_image_tag(attrs)
+    else:
+        medal_img = "-"
+
+    data = [
+        ("Author", author_link),
+        ("Language", kernel.language),
+        ("Best Score", kernel.best_score),
+        ("Votes", kernel.votes),
+        ("Medal", medal_img),
+        ("Comments", kernel.comments),
+        ("Last Updated", kernel.last_updated),
+    ]
+    headers = ["Key", "Value"]
+
+    assert len(data[0]) == len(headers)
+
+    return data, headers
+
+
+def format_commits(commits):
+    data = [
+        (
+            c.version,
+            c.score,
+            c.committed_at,
+            c.run_time,
+            c.added,
+            c.deleted,
+            html.make_anchor_tag("Open", {"href": c.url}),
+        )
+        for c in commits
+    ]
+
+    assert len(data) == 0 or len(data[0]) == len(COMMIT_HEADERS)
+
+    return data, COMMIT_HEADERS
+
+
+def highlight_best_score(row, best_score):
+    should_highlight = float(row["Score"]) == float(best_score)
+    return [
+        ("background-color: #d5fdd5" if should_highlight else "")
+        for _ in range(len(row))  # len(row) returns the number of columns.
+    ]
+
+
+def make_commit_table(commits, best_score):
+    data, headers = format_commits(commits)
+
+    # `premailer.transform` turns CSS blocks into style attributes.
+    # See: https://github.com/peterbe/premailer
+    return transform(
+        pd.DataFrame(data, columns=headers)
+        .style.apply(highlight_best_score, best_score=best_score, axis=1)
+        .hide_index()
+        .render()
+    )
+
+
+def make_profile(kernel_link, thumbnail, commit_table, meta_table):
+    return f"""
+<br>
+
+# {kernel_link}
+
+{thumbnail}
+
+### Kernel Information
+
+{meta_table}
+
+### Commit History
+
+The highlighted row(s) corresponds to the best score.
+
+{commit_table}
+""".strip()
+
+
+def render_kernel(kernel):
+    """
+    Render the profile of a kernel (and its commit history) as markdown.
+    """
+    commit_table = make_commit_table(kernel.commits, kernel.best_score)
+    meta_table = md.make_table(*format_kernel_metadata(kernel))
+    kernel_link = md.make_link(kernel.name, kernel.url)
+    thumbnail = html.make_thumbnail(
+        kernel.thumbnail_src, kernel.tier_src, kernel.author_url
+    )
+
+    return make_profile(kernel_link, thumbnail, commit_table, meta_table)
+
+
+def render_markdown(profiles):
+    timestamp = "## Last Updated: {}".format(
+        datetime.utcnow().strftime("%Y/%m/%d %H:%M:%S (UTC)")
+    )
+    return (2 * "\n").join([DESCRIPTION, timestamp, *profiles])
+
+
+def write_profiles(comp_slug, profiles, out_dir):
+    """
+    Write rendered profiles to `<out_dir>/<comp_slug>.md` and convert it to a notebook.
+    Returns the paths of the markdown file and the notebook.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    md_path = os.path.join(out_dir, f"{comp_slug}.md")
+    with open(md_path, "w") as f:
+        f.write(render_markdown(profiles))
+
+    # Convert markdown to notebook.
+    nb_path = utils.replace_ext(md_path, ".ipynb")
+    utils.markdown_to_notebook(md_path, nb_path)
+
+    return md_path, nb_path
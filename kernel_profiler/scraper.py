@@ -0,0 +1,503 @@
+import functools
+import json
+import re
+import time
+
+import requests
+from bs4 import BeautifulSoup
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from tqdm import tqdm
+
+from kernel_profiler import utils
+from kernel_profiler.driver import DriverManager, create_chrome_driver
+from kernel_profiler.metrics import Metrics
+from kernel_profiler.records import Commit, Kernel
+
+
+TOP_URL = "https://www.kaggle.com"
+TIMEOUT = 15  # seconds
+MAX_FETCH_RETRIES = 3
+MAX_RETRY_DELAY = 60  # seconds
+
+
+def make_soup(markup):
+    return BeautifulSoup(markup, "lxml")
+
+
+# Fields that may be missing from a kernel card or a version row. The others are
+# required, and a missing one is reported by `check_fields` in both extract modes.
+OPTIONAL_CARD_FIELDS = ["medal_src"]
+OPTIONAL_ROW_FIELDS = ["href"]
+
+# JavaScript equivalents of `extract_kernel_card` and `extract_version_row`. They run
+# in the page via `execute_script` and return only the fields the profiler needs, so
+# the whole DOM doesn't have to be serialized, transferred and parsed again. Missing
+# elements give null like the helpers below give None (`== null` also matches the
+# undefined returned for a missing item of a NodeList).
+KERNEL_CARDS_SCRIPT = """
+const content = (el) => (el == null ? null : el.textContent);
+const text = (el) => (el == null ? null : el.textContent.trim());
+const attr = (el, name) => (el == null ? null : el.getAttribute(name));
+const trim = (s) => (s == null ? null : s.trim());
+
+return Array.from(document.querySelectorAll("div.block-link--bordered"))
+  .filter((ker) => ker.querySelector("div.kernel-list-item__score") != null)
+  .map((ker) => {
+    const tooltips = ker.querySelectorAll("span.tooltip-container");
+    return {
+      name: content(ker.querySelector("div.kernel-list-item__name")),
+      href: attr(ker.querySelector("a.block-link__anchor"), "href"),
+      author_name: trim(attr(tooltips[0], "data-tooltip")),
+      author_href: attr(ker.querySelector("a.avatar"), "href"),
+      thumbnail_src: attr(ker.querySelector("img.avatar__thumbnail"), "src"),
+      tier_src: attr(ker.querySelector("img.avatar__tier"), "src"),
+      votes: text(ker.querySelector("span.vote-button__vote-count")),
+      comments: text(ker.querySelector("a.kernel-list-item__info-block--comment")),
+      last_updated: text(ker.querySelector("div.kernel-list-item__details > span")),
+      best_score: text(ker.querySelector("div.kernel-list-item__score")),
+      language: text(tooltips[2]),
+      medal_src: attr(ker.querySelector("img.kernel-list-item__medals"), "src"),
+    };
+  });
+""".strip()
+
+VERSIONS_SCRIPT = """
+const text = (el) => (el == null ? null : el.textContent.trim());
+const attr = (el, name) => (el == null ? null : el.getAttribute(name));
+const table = document.querySelector(
+  "table[class*='VersionsPaneContent_IdeVersionsTable']"
+);
+const rows = table == null ? null : Array.from(table.querySelectorAll("tbody > div"));
+
+return {
+  rows: rows == null ? null : rows.map((row) => {
+    const version = row.querySelector("a:nth-of-type(2)");
+    return {
+      version: text(version),
+      href: attr(version, "href"),
+      committed_at: text(row.querySelector(":scope > span")),
+      run_time: text(row.querySelector("a:nth-of-type(4)")),
+      added: text(row.querySelector("span:nth-of-type(2)")),
+      deleted: text(row.querySelector("span:nth-of-type(3)")),
+      status_icon: attr(row.querySelector("a:nth-of-type(1) > svg"), "data-icon"),
+    };
+  }),
+  // Only the scripts holding the page state are needed to read the scores
+  // (the same check as `utils.is_state_script`).
+  states: Array.from(document.scripts)
+    .map((script) => script.text)
+    .filter((text) => text.includes(%s)),
+};
+""".strip()
+VERSIONS_SCRIPT %= json.dumps(utils.STATE_PUSH)
+
+
+def select_first(soup, selector):
+    found = soup.select(selector)
+    if len(found) > 0:
+        return found[0]
+
+
+def get_text(el, strip=True):
+    if el is not None:
+        return el.text.strip() if strip else el.text
+
+
+def get_attr(el, name):
+    if el is not None:
+        return el.get(name)
+
+
+def check_fields(fields, optional, what):
+    """
+    Raise `ValueError` if any of the required fields is missing.
+
+    Examples
+    --------
+    >>> check_fields({"a": 1, "b": None}, ["b"], "card")
+
+    >>> check_fields({"a": None, "b": None}, ["b"], "card")
+    Traceback (most recent call last):
+      ...
+    ValueError: Missing fields in card: a
+
+    """
+    missing = [k for k, v in fields.items() if v is None and k not in optional]
+    if len(missing) > 0:
+        raise ValueError(f"Missing fields in {what}: {', '.join(missing)}")
+
+
+def extract_medal_src(soup):
+    return get_attr(select_first(soup, "img.kernel-list-item__medals"), "src")
+
+
+def extract_kernel_card(soup):
+    tooltips = soup.select("span.tooltip-container")
+    author_name = get_attr(tooltips[0] if len(tooltips) > 0 else None, "data-tooltip")
+
+    return {
+        "name": get_text(select_first(soup, "div.kernel-list-item__name"), False),
+        "href": get_attr(select_first(soup, "a.block-link__anchor"), "href"),
+        "author_name": author_name.strip() if author_name is not None else None,
+        "author_href": get_attr(select_first(soup, "a.avatar"), "href"),
+        "thumbnail_src": get_attr(select_first(soup, "img.avatar__thumbnail"), "src"),
+        "tier_src": get_attr(select_first(soup, "img.avatar__tier"), "src"),
+        "votes": get_text(select_first(soup, "span.vote-button__vote-count")),
+        "comments": get_text(
+            select_first(soup, "a.kernel-list-item__info-block--comment")
+        ),
+        "last_updated": get_text(
+            select_first(soup, "div.kernel-list-item__details > span")
+        ),
+        "best_score": get_text(select_first(soup, "div.kernel-list-item__score")),
+        "language": get_text(tooltips[2] if len(tooltips) > 2 else None),
+        "medal_src": extract_medal_src(soup),
+    }
+
+
+def make_kernel(card, base_url=TOP_URL):
+    check_fields(card, OPTIONAL_CARD_FIELDS, "kernel card")
+    medal_src = card["medal_src"]
+
+    return Kernel(
+        name=card["name"],
+        url=base_url + card["href"],
+        author_name=card["author_name"],
+        author_id=card["author_href"].strip("/"),
+        author_url=base_url + card["author_href"],
+        thumbnail_src=card["thumbnail_src"],
+        tier_src=base_url + card["tier_src"],
+        votes=card["votes"],
+        comments=card["comments"],
+        last_updated=card["last_updated"],
+        best_score=card["best_score"],
+        language=card["language"],
+        medal_src=(
+            # Replace "notebook" with "discussion" to use a bigger medal image.
+            base_url + medal_src.replace("notebooks", "discussion")
+            if medal_src is not None
+            else ""
+        ),
+        commits=[],
+    )
+
+
+def extract_kernels(soup, base_url=TOP_URL):
+    kernels = []
+
+    for ker in soup.select("div.block-link--bordered"):
+        if len(ker.select("div.kernel-list-item__score")) == 0:
+            continue
+
+        kernels.append(make_kernel(extract_kernel_card(ker), base_url))
+    return kernels
+
+
+def extract_embedded_versions(soup):
+    # The kernel page embeds its state (including the versions) in script tags.
+    states = [
+        s.string
+        for s in soup.find_all("script")
+        if s.string is not None and utils.is_state_script(s.string)
+    ]
+    return utils.extract_versions("\n".join(states))
+
+
+def get_retry_delay(resp, attempt):
+    """
+    Return how many seconds to wait before retrying a failed request: what
+    `Retry-After` says if it's given in seconds, otherwise an exponential backoff.
+
+    Examples
+    --------
+    >>> resp = requests.Response()
+    >>> resp.headers["Retry-After"] = "3"
+    >>> get_retry_delay(resp, 0)
+    3.0
+
+    >>> get_retry_delay(requests.Response(), 2)
+    4
+
+    """
+    try:
+        delay = float(resp.headers["Retry-After"])
+    except (KeyError, ValueError):
+        delay = 2 ** attempt
+    return min(delay, MAX_RETRY_DELAY)
+
+
+def fetch_public_score(url, metrics=None, max_retries=MAX_FETCH_RETRIES):
+    """
+    Fetch a version page and extract its public score. Throttled ("429") and
+    server error responses are retried up to `max_retries` times. If the page
+    still can't be fetched, `requests.HTTPError` is raised so that a failed
+    request isn't mistaken for a version without a score.
+    """
+    for attempt in range(max_retries + 1):
+        resp = requests.get(url)
+        if metrics is not None:
+            metrics.inc("version_requests", status=resp.status_code)
+
+        should_retry = resp.status_code == 429 or resp.status_code >= 500
+        if not should_retry or attempt == max_retries:
+            break
+
+        time.sleep(get_retry_delay(resp, attempt))
+
+    resp.raise_for_status()
+    return utils.extract_public_score(resp.text)
+
+
+def extract_version_row(row):
+    version = select_first(row, "a:nth-of-type(2)")
+
+    return {
+        "version": get_text(version),
+        "href": get_attr(version, "href"),
+        "committed_at": get_text(row.find("span", recursive=False)),
+        "run_time": get_text(select_first(row, "a:nth-of-type(4)")),
+        "added": get_text(select_first(row, "span:nth-of-type(2)")),
+        "deleted": get_text(select_first(row, "span:nth-of-type(3)")),
+        "status_icon": get_attr(
+            select_first(row, "a:nth-of-type(1) > svg"), "data-icon"
+        ),
+    }
+
+
+def make_commits(
+    rows, embedded_versions, base_url=TOP_URL, metrics=None, progress=True
+):
+    metrics = metrics or Metrics()
+    commits = []
+
+    if rows is None:
+        raise ValueError("The versions table was not found")
+
+    # Progress bars drawn from several threads at once overwrite each other, so
+    # callers running this in parallel turn it off.
+    for row in tqdm(rows, disable=not progress):
+        check_fields(row, OPTIONAL_ROW_FIELDS, "version row")
+        href = row["href"]
+        version = row["version"]
+        run_time = row["run_time"]
+
+        if href is None:
+            metrics.inc("commits_skipped", reason="no_link")
+            continue
+
+        embedded = embedded_versions.get(utils.extract_version_id(href), {})
+
+        # Ignore failed commits.
+        if row["status_icon"] == "times-circle" or embedded.get("status") == "error":
+            metrics.inc("commits_skipped", reason="failed")
+            continue
+
+        if run_time == "" and "run_time" in embedded:
+            run_time = embedded["run_time"]
+
+        # Extract the public score. Use the score embedded in the kernel page if
+        # available and only fetch the version page when it's missing.
+        url = base_url + href
+        if "score" in embedded:
+            score = embedded["score"]
+            metrics.inc("version_scores", source="embedded")
+        else:
+            try:
+                score = fetch_public_score(url, metrics)
+            except requests.RequestException as e:
+                # Keep going, but count it apart from versions without a score.
+                print(f"Failed to fetch {url}: {e}")
+                metrics.inc("commits_skipped", reason="request_failed")
+                continue
+            metrics.inc("version_scores", source="fetched")
+
+        # Ignore commits that do not have a score.
+        if score is None:
+            metrics.inc("commits_skipped", reason="no_score")
+            continue
+
+        ver_num = utils.extract_int(version)
+
+        commits.append(
+            Commit(
+                version=ver_num if (ver_num is not None) else version,
+                score=score,
+                committed_at=row["committed_at"],
+                run_time=utils.round_run_time(run_time),
+                added=row["added"],
+                deleted=row["deleted"],
+                url=url,
+            )
+        )
+
+    return commits
+
+
+def extract_commits(soup, base_url=TOP_URL, metrics=None, progress=True):
+    pattern = re.compile(r"VersionsPaneContent_IdeVersionsTable.+")
+    table = soup.find("table", {"class": pattern})
+    rows = table.select("tbody > div") if table is not None else None
+    return make_commits(
+        [extract_version_row(row) for row in rows] if rows is not None else None,
+        extract_embedded_versions(soup),
+        base_url,
+        metrics,
+        progress,
+    )
+
+
+def extract_page_kernels(page, base_url=TOP_URL):
+    """
+    Extract kernels from what `read_page` returned for the competition listing:
+    either the page source or the output of `KERNEL_CARDS_SCRIPT`.
+    """
+    if isinstance(page, str):
+        return extract_kernels(make_soup(page), base_url)
+
+    return [make_kernel(card, base_url) for card in page]
+
+
+def extract_page_commits(page, base_url=TOP_URL, metrics=None, progress=True):
+    """
+    Extract commits from what `read_page` returned for a kernel: either the page
+    source or the output of `VERSIONS_SCRIPT`.
+    """
+    if isinstance(page, str):
+        return extract_commits(make_soup(page), base_url, metrics, progress)
+
+    embedded_versions = utils.extract_versions("\n".join(page["states"]))
+    return make_commits(page["rows"], embedded_versions, base_url, metrics, progress)
+
+
+def read_page(driver, script, extract_mode="html"):
+    """
+    Return the page source ("html" mode) or, in "script" mode, the result of
+    running `script` in the page.
+    """
+    if extract_mode == "script":
+        return driver.execute_script(script)
+
+    return driver.page_source
+
+
+def open_kernel_list(driver, comp_url, extract_mode="html"):
+    # Open the notebooks tab.
+    driver.get(comp_url)
+
+    # Click `Sort By` select box.
+    WebDriverWait(driver, TIMEOUT).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "div.Select-value"))
+    )
+    sort_by = driver.find_element_by_css_selector("div.Select-value")
+    sort_by.click()
+
+    # Select `Best score` option.
+    WebDriverWait(driver, TIMEOUT).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "div.Select-menu-outer"))
+    )
+    options = driver.find_elements_by_css_selector("div.Select-menu-outer div")
+    best_score_opt = [opt for opt in options if opt.text == "Best Score"][0]
+    best_score_opt.click()
+
+    WebDriverWait(driver, TIMEOUT).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "a.block-link__anchor"))
+    )
+
+    return read_page(driver, KERNEL_CARDS_SCRIPT, extract_mode)
+
+
+def open_kernel(driver, kernel_url, extract_mode="html"):
+    # Open the kernel.
+    driver.get(kernel_url)
+
+    # Display the commit table.
+    WebDriverWait(driver, TIMEOUT).until(
+        EC.presence_of_element_located(
+            (By.XPATH, "//div[contains(@class, 'VersionsInfoBox')]")
+        )
+    )
+    commit_link = driver.find_element_by_xpath(
+        "//div[contains(@class, 'VersionsInfoBox')]"
+    )
+    commit_link.click()
+
+    WebDriverWait(driver, TIMEOUT).until(
+        EC.presence_of_element_located(
+            (By.CSS_SELECTOR, "div.vote-button__voters-modal-title")
+        )
+    )
+
+    return read_page(driver, VERSIONS_SCRIPT, extract_mode)
+
+
+def iter_kernels(
+    comp_slug,
+    max_num_kernels,
+    max_pages_per_driver=0,
+    max_driver_memory=0,
+    driver_options=None,
+    base_url=TOP_URL,
+    extract_mode="html",
+    metrics=None,
+    create_driver=None,
+    load_kernel_list=open_kernel_list,
+    load_kernel=open_kernel,
+):
+    """
+    Open the competition listing and yield the page of each kernel (see
+    `read_page`) along with the kernel.
+
+    `create_driver` (default: `create_chrome_driver` with `driver_options`),
+    `load_kernel_list` and `load_kernel` can be replaced, e.g. to load the pages
+    without a browser. The loaders take the same arguments as `open_kernel_list`
+    and `open_kernel`.
+
+    When attaching to a running browser (`debugger_address` in `driver_options`),
+    restarting the driver only attaches to the same browser again and the memory
+    of the browser isn't counted, so `max_pages_per_driver` and
+    `max_driver_memory` are rejected.
+    """
+    if (driver_options or {}).get("debugger_address") is not None and (
+        max_pages_per_driver > 0 or max_driver_memory > 0
+    ):
+        raise ValueError(
+            "max_pages_per_driver and max_driver_memory can't be used when "
+            "attaching to a running browser"
+        )
+
+    metrics = metrics or Metrics()
+    base_url = base_url.rstrip("/")
+    comp_url = f"{base_url}/c/{comp_slug}/notebooks"
+
+    # The driver may be restarted between kernels (or retried on a crash), so every
+    # page is opened through the manager. The kernel list is extracted once up front
+    # and kernels are opened by URL, so the position in the list survives restarts.
+    if create_driver is None:
+        create_driver = functools.partial(
+            create_chrome_driver, **(driver_options or {})
+        )
+    with DriverManager(
+        create_driver,
+        max_pages=max_pages_per_driver,
+        max_memory_mb=max_driver_memory,
+        metrics=metrics,
+    ) as manager:
+        # Extract kernels.
+        with metrics.time("stage_duration_seconds", stage="fetch"):
+            list_page = manager.run(
+                lambda driver: load_kernel_list(driver, comp_url, extract_mode)
+            )
+        kernels = extract_page_kernels(list_page, base_url)
+        num_kernels = min(max_num_kernels, len(kernels))
+
+        for ker_idx, kernel in enumerate(kernels[:num_kernels]):
+            print(f"Processing ({ker_idx + 1} / {num_kernels})")
+
+            with metrics.time("stage_duration_seconds", stage="fetch"):
+                kernel_page = manager.run(
+                    lambda driver: load_kernel(driver, kernel.url, extract_mode)
+                )
+
+            yield kernel_page, kernel
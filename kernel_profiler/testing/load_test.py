@@ -0,0 +1,228 @@
+"""
+Profile a stand-in Kaggle server (see `kernel_profiler.testing.server`) with growing
+amounts of data and report throughput and memory usage, e.g.:
+
+    python -m kernel_profiler.testing.load_test -k 10 100 1000 -v 10 100 500
+
+Kernels go through `iter_competition` like they do in `profile`. By default the
+browser is swapped for `requests`, which measures the parsing and version fetching
+cost without Chrome. Pass `--chrome` to load the pages with Chrome and also report
+the memory used by the browser. The server runs in a separate process, so it isn't
+counted in the memory usage of the profiler.
+"""
+
+import argparse
+import contextlib
+import itertools
+import multiprocessing
+import os
+import time
+from collections import Counter
+
+import psutil
+import requests
+
+from kernel_profiler import markdown as md
+from kernel_profiler.api import iter_competition
+from kernel_profiler.driver import create_chrome_driver, get_process_tree_memory
+from kernel_profiler.testing.server import FakeKaggle, FakeKaggleServer
+
+
+COMP_SLUG = "load-test"
+
+
+class RequestsDriver:
+    """
+    Stands in for the browser when pages are loaded with `requests`.
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+
+    def quit(self):
+        self.session.close()
+
+
+def load_page(driver, url, extract_mode="html"):
+    # Loads the pages in place of `scraper.open_kernel_list` and `scraper.open_kernel`.
+    resp = driver.session.get(url)
+    resp.raise_for_status()
+    return resp.text
+
+
+def serve(kaggle, latency, error_rate, conn):
+    with FakeKaggleServer(kaggle, latency=latency, error_rate=error_rate) as server:
+        conn.send(server.base_url)
+        # Serve until the client is done.
+        conn.recv()
+    conn.send(server.stats)
+
+
+@contextlib.contextmanager
+def run_server(kaggle, latency, error_rate):
+    """
+    Run a `FakeKaggleServer` in a separate process. Yields the base URL of the
+    server and a counter that is filled with the server stats on exit.
+    """
+    conn, child_conn = multiprocessing.Pipe()
+    proc = multiprocessing.Process(
+        target=serve, args=(kaggle, latency, error_rate, child_conn), daemon=True
+    )
+    proc.start()
+    child_conn.close()
+
+    base_url = conn.recv()
+    stats = Counter()
+    try:
+        yield base_url, stats
+    finally:
+        conn.send("stop")
+        stats.update(conn.recv())
+        proc.join()
+
+
+def count_expected_commits(kaggle):
+    return sum(
+        1
+        for idx in range(kaggle.num_kernels)
+        for v in kaggle.versions(idx)
+        if v["status"] == "complete" and v["score"] is not None
+    )
+
+
+def run(kaggle, latency, error_rate, use_chrome, num_workers):
+    drivers = []
+
+    def create_driver():
+        driver = create_chrome_driver() if use_chrome else RequestsDriver()
+        drivers.append(driver)
+        return driver
+
+    def browser_memory():
+        # Only the current driver is alive, the others have been quit.
+        if len(drivers) == 0 or not use_chrome:
+            return 0
+        return get_process_tree_memory(drivers[-1].service.process.pid)
+
+    loaders = {}
+    if not use_chrome:
+        loaders = {"load_kernel_list": load_page, "load_kernel": load_page}
+
+    with run_server(kaggle, latency, error_rate) as (base_url, stats):
+        kernels = iter_competition(
+            COMP_SLUG,
+            kaggle.num_kernels,
+            base_url=base_url,
+            num_workers=num_workers,
+            create_driver=create_driver,
+            **loaders,
+        )
+
+        process = psutil.Process(os.getpid())
+        start = time.perf_counter()
+        num_kernels = 0
+        num_commits = 0
+        peak_rss = process.memory_info().rss
+        peak_browser_memory = 0
+        error = ""
+
+        # Consume the kernels one by one like `profile` does, without keeping them.
+        try:
+            for kernel in kernels:
+                num_kernels += 1
+                num_commits += len(kernel.commits)
+                peak_rss = max(peak_rss, process.memory_info().rss)
+                peak_browser_memory = max(peak_browser_memory, browser_memory())
+        except Exception as e:
+            # Report the failure (e.g. a throttled page) along with the others.
+            error = type(e).__name__
+
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "Kernels": num_kernels,
+        "Versions": kaggle.num_versions,
+        "Time (s)": f"{elapsed:.2f}",
+        "Kernels/s": f"{num_kernels / elapsed:.2f}",
+        "Version Requests": sum(stats[("version", s)] for s in (200, 429)),
+        "429s": sum(n for (_, status), n in stats.items() if status == 429),
+        "Commits": f"{num_commits} / {count_expected_commits(kaggle)}",
+        "Peak RSS (MB)": f"{peak_rss / 1024 ** 2:.1f}",
+    }
+    if use_chrome:
+        result["Browser Peak Memory (MB)"] = f"{peak_browser_memory / 1024 ** 2:.1f}"
+    result["Error"] = error or "-"
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Kernel Profiler load test")
+    parser.add_argument(
+        "-k",
+        "--num-kernels",
+        type=int,
+        nargs="+",
+        default=[10, 100],
+        help="Numbers of kernels to test (default: 10 100)",
+    )
+    parser.add_argument(
+        "-v",
+        "--num-versions",
+        type=int,
+        nargs="+",
+        default=[10, 100],
+        help="Numbers of versions per kernel to test (default: 10 100)",
+    )
+    parser.add_argument(
+        "--embed-ratio",
+        type=float,
+        default=1.0,
+        help="Fraction of scores embedded in the kernel pages (default: 1.0)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds to wait before each response (default: 0.0)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help='Fraction of requests answered with "429" (default: 0.0)',
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=2,
+        help="Number of threads parsing kernel pages (default: 2)",
+    )
+    parser.add_argument(
+        "--chrome", action="store_true", help="Load the pages with Chrome"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = []
+
+    for num_kernels, num_versions in itertools.product(
+        args.num_kernels, args.num_versions
+    ):
+        kaggle = FakeKaggle(
+            num_kernels=num_kernels,
+            num_versions=num_versions,
+            embed_ratio=args.embed_ratio,
+        )
+        results.append(
+            run(kaggle, args.latency, args.error_rate, args.chrome, args.num_workers)
+        )
+
+    headers = list(results[0].keys())
+    print(md.make_table([list(r.values()) for r in results], headers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+A local stand-in for Kaggle that serves generated competition, kernel and version
+pages in the shapes the scraper expects. Use it to test how the profiler behaves
+with many kernels, many versions, slow responses or throttling, e.g.:
+
+    python -m kernel_profiler.testing.server --num-kernels 1000 --num-versions 500
+    profile -c titanic --base-url http://127.0.0.1:8000
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+PAGE = """
+<html>
+<head><script>{script}</script></head>
+<body>
+{body}
+</body>
+</html>
+""".strip()
+
+LISTING_BODY = """
+<div class="Select-value" onclick="
+  document.querySelector('div.Select-menu-outer').style.display = 'block';
+">Hotness</div>
+<div class="Select-menu-outer" style="display: none">
+  <div onclick="this.parentNode.style.display = 'none'">Hotness</div>
+  <div onclick="this.parentNode.style.display = 'none'">Best Score</div>
+</div>
+{cards}
+""".strip()
+
+CARD = """
+<div class="block-link block-link--bordered">
+  <a class="block-link__anchor" href="{path}"></a>
+  <a class="avatar" href="/{author_id}">
+    <img class="avatar__thumbnail" src="/static/images/avatars/{author_id}.png">
+    <img class="avatar__tier" src="/static/images/tiers/expert.svg">
+  </a>
+  <div class="kernel-list-item__name">{name}</div>
+  <span class="tooltip-container" data-tooltip="{author_name}">{author_name}</span>
+  <span class="tooltip-container" data-tooltip="Notebook">Notebook</span>
+  <span class="tooltip-container">{language}</span>
+  <span class="vote-button__vote-count">{votes}</span>
+  <a class="kernel-list-item__info-block--comment">{comments}</a>
+  <div class="kernel-list-item__details"><span>{last_updated}</span></div>
+  <div class="kernel-list-item__score">{best_score}</div>
+  {medal}
+</div>
+""".strip()
+
+KERNEL_BODY = """
+<div class="VersionsInfoBox_a1b2c3" onclick="
+  document.getElementById('versions').style.display = 'block';
+">{num_versions} versions</div>
+<div id="versions" style="display: none">
+  <div class="vote-button__voters-modal-title">Versions</div>
+  <table class="VersionsPaneContent_IdeVersionsTable-a1b2c3">
+    <tbody>{rows}</tbody>
+  </table>
+</div>
+""".strip()
+
+ROW = """
+<div>
+  <a><svg data-icon="{status_icon}"></svg></a>
+  <a href="{path}?scriptVersionId={id}">Version {number}</a>
+  <a></a>
+  <a>{run_time}s</a>
+  <span>{committed_at}</span>
+  <span>+{added}</span>
+  <span>-{deleted}</span>
+</div>
+""".strip()
+
+
+def make_state_script(state):
+    return "Kaggle.State.push({});".format(json.dumps(state, separators=(",", ":")))
+
+
+class FakeKaggle:
+    """
+    Deterministically generate kernels and their versions.
+
+    Parameters
+    ----------
+    num_kernels : int
+        Number of kernels in the competition listing.
+    num_versions : int
+        Number of versions of each kernel.
+    embed_ratio : float
+        Fraction of versions whose score is embedded in the kernel page. The
+        scores of the other versions are only available on the version pages.
+    seed : int
+        Seed for the generated data.
+
+    Examples
+    --------
+    >>> kaggle = FakeKaggle(num_kernels=2, num_versions=3)
+    >>> len(kaggle.versions(0))
+    3
+    >>> kaggle.versions(0) == FakeKaggle(num_kernels=2, num_versions=3).versions(0)
+    True
+
+    """
+
+    def __init__(self, num_kernels=20, num_versions=10, embed_ratio=1.0, seed=0):
+        self.num_kernels = num_kernels
+        self.num_versions = num_versions
+        self.embed_ratio = embed_ratio
+        self.seed = seed
+        self._versions = {}
+
+    def kernel_path(self, idx):
+        return f"/user{idx}/kernel-{idx}"
+
+    def versions(self, idx):
+        # Version pages are requested many times per kernel, so generate them once.
+        if idx not in self._versions:
+            self._versions[idx] = self.generate_versions(idx)
+        return self._versions[idx]
+
+    def generate_versions(self, idx):
+        rng = random.Random(f"{self.seed}-{idx}")
+        versions = []
+
+        for number in range(1, self.num_versions + 1):
+            failed = rng.random() < 0.05
+            has_score = not failed and rng.random() > 0.05
+            versions.append(
+                {
+                    "id": idx * self.num_versions + number,
+                    "number": number,
+                    "status": "error" if failed else "complete",
+                    "score": f"{rng.uniform(0.5, 0.9):.5f}" if has_score else None,
+                    "run_time": rng.randint(10, 20000),
+                    "embedded": rng.random() < self.embed_ratio,
+                }
+            )
+        return versions
+
+    def best_score(self, idx):
+        scores = [v["score"] for v in self.versions(idx) if v["score"] is not None]
+        return max(scores, key=float) if len(scores) > 0 else "0.00000"
+
+    def render_listing(self):
+        cards = []
+
+        # Kaggle sorts kernels by the best score, so do the same.
+        best_scores = {idx: self.best_score(idx) for idx in range(self.num_kernels)}
+        for idx in sorted(best_scores, key=lambda i: -float(best_scores[i])):
+            medal = (
+                '<img class="kernel-list-item__medals" '
+                'src="/static/images/medals/notebooks/goldl@1x.png">'
+                if idx % 3 == 0
+                else ""
+            )
+            cards.append(
+                CARD.format(
+                    path=self.kernel_path(idx),
+                    author_id=f"user{idx}",
+                    author_name=f"User {idx}",
+                    name=f"Kernel {idx}",
+                    language="Python" if idx % 2 == 0 else "R",
+                    votes=idx % 97,
+                    comments=idx % 13,
+                    last_updated=f"{idx % 30 + 1} days ago",
+                    best_score=best_scores[idx],
+                    medal=medal,
+                )
+            )
+
+        body = LISTING_BODY.format(cards="\n".join(cards))
+        return PAGE.format(script="", body=body)
+
+    def render_kernel(self, idx):
+        versions = self.versions(idx)
+        rows = [
+            ROW.format(
+                path=self.kernel_path(idx),
+                status_icon=(
+                    "times-circle" if v["status"] == "error" else "check-circle"
+                ),
+                committed_at=f"{len(versions) - v['number'] + 1} days ago",
+                added=v["number"] % 50,
+                deleted=v["number"] % 7,
+                **v,
+            )
+            for v in reversed(versions)
+        ]
+        state = {
+            "kernel": {
+                "id": idx,
+                "versions": [
+                    {
+                        "id": v["id"],
+                        "versionNumber": v["number"],
+                        "status": v["status"],
+                        "runTimeSeconds": v["run_time"],
+                        "publicScore": v["score"],
+                    }
+                    for v in versions
+                    if v["embedded"]
+                ],
+            }
+        }
+        body = KERNEL_BODY.format(num_versions=len(versions), rows="\n".join(rows))
+        return PAGE.format(script=make_state_script(state), body=body)
+
+    def render_version(self, idx, version_id):
+        for v in self.versions(idx):
+            if str(v["id"]) == version_id:
+                state = {"kernelRun": {"id": v["id"], "publicScore": v["score"]}}
+                return PAGE.format(script=make_state_script(state), body="")
+
+
+class FakeKaggleHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        route, body = server.route(self.path)
+
+        if server.latency > 0:
+            time.sleep(server.latency)
+
+        if server.should_throttle():
+            status = 429
+            body = "Too Many Requests"
+        elif body is None:
+            status = 404
+            body = "Not Found"
+        else:
+            status = 200
+
+        server.record(route, status)
+
+        content = body.encode("utf-8")
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # Keep the output of load tests readable.
+        pass
+
+
+class FakeKaggleServer(ThreadingHTTPServer):
+    """
+    Serve a `FakeKaggle` over HTTP.
+
+    Parameters
+    ----------
+    kaggle : FakeKaggle
+        The data to serve.
+    address : tuple
+        `(host, port)` to listen on. Port 0 picks a free port.
+    latency : float
+        Seconds to wait before responding to each request.
+    error_rate : float
+        Fraction of requests answered with "429 Too Many Requests".
+
+    Examples
+    --------
+    >>> import requests
+    >>>
+    >>> with FakeKaggleServer(FakeKaggle(num_kernels=1)) as server:
+    ...     resp = requests.get(server.base_url + "/c/titanic/notebooks")
+    >>> resp.status_code
+    200
+    >>> server.stats
+    Counter({('listing', 200): 1})
+
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, kaggle, address=("127.0.0.1", 0), latency=0.0, error_rate=0.0, seed=0
+    ):
+        super().__init__(address, FakeKaggleHandler)
+        self.kaggle = kaggle
+        self.latency = latency
+        self.error_rate = error_rate
+        self.stats = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def should_throttle(self):
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def record(self, route, status):
+        with self._lock:
+            self.stats[(route, status)] += 1
+
+    def route(self, path):
+        """
+        Return the name of the route and the page for a request path
+        (the page is None if it's not found).
+        """
+        url = urlparse(path)
+        parts = url.path.strip("/").split("/")
+
+        if len(parts) == 3 and parts[0] == "c" and parts[2] == "notebooks":
+            return "listing", self.kaggle.render_listing()
+
+        if len(parts) == 2 and parts[1].startswith("kernel-"):
+            idx = int(parts[1][len("kernel-") :])
+            if idx >= self.kaggle.num_kernels:
+                return "kernel", None
+
+            version_id = parse_qs(url.query).get("scriptVersionId")
+            if version_id is not None:
+                return "version", self.kaggle.render_version(idx, version_id[0])
+
+            return "kernel", self.kaggle.render_kernel(idx)
+
+        return "other", None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Kaggle stand-in server")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--num-kernels", type=int, default=20, help="Number of kernels (default: 20)"
+    )
+    parser.add_argument(
+        "--num-versions",
+        type=int,
+        default=10,
+        help="Number of versions per kernel (default: 10)",
+    )
+    parser.add_argument(
+        "--embed-ratio",
+        type=float,
+        default=1.0,
+        help="Fraction of scores embedded in the kernel pages (default: 1.0)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds to wait before each response (default: 0.0)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help='Fraction of requests answered with "429" (default: 0.0)',
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    kaggle = FakeKaggle(
+        num_kernels=args.num_kernels,
+        num_versions=args.num_versions,
+        embed_ratio=args.embed_ratio,
+        seed=args.seed,
+    )
+    server = FakeKaggleServer(
+        kaggle,
+        address=(args.host, args.port),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"Serving on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
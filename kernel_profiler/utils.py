@@ -1,9 +1,14 @@
+import json
 import os
 import re
 
 import jupytext
 
 
+# Kaggle pages embed their state (e.g. the versions of a kernel) in calls to this.
+STATE_PUSH = "Kaggle.State.push("
+
+
 def replace_ext(path, ext):
     """
     Examples
@@ -47,11 +52,14 @@ def extract_public_score(s):
     >>> extract_public_score('"publicScore":"0.123"')
     '0.123'
 
+    >>> extract_public_score('"publicScore":"","status":"complete"') is None
+    True
+
     >>> extract_public_score("") is None
     True
 
     """
-    m = re.search(r'"publicScore":"(.+?)"', s)
+    m = re.search(r'"publicScore":"([^"]+)"', s)
     if m is not None:
         return m.group(1)
 
@@ -72,6 +80,156 @@ def extract_best_public_score(s):
         return m.group(1)
 
 
+def extract_version_id(url):
+    """
+    Examples
+    --------
+    >>> extract_version_id("/user/kernel?scriptVersionId=123")
+    '123'
+
+    >>> extract_version_id("/user/kernel") is None
+    True
+
+    """
+    m = re.search(r"scriptVersionId=(\d+)", url)
+    if m is not None:
+        return m.group(1)
+
+
+def is_state_script(text):
+    """
+    Return True if a script pushes a page state (see `extract_states`).
+
+    Examples
+    --------
+    >>> is_state_script('Kaggle.State.push({"a":1});')
+    True
+
+    >>> is_state_script("console.log(1);")
+    False
+
+    """
+    return STATE_PUSH in text
+
+
+def extract_states(s):
+    """
+    Decode the page states pushed by `Kaggle.State.push(...)` calls in `s`.
+    Calls whose payload isn't valid JSON are skipped.
+
+    Examples
+    --------
+    >>> extract_states('Kaggle.State.push({"a":1});Kaggle.State.push({"b":"})"});')
+    [{'a': 1}, {'b': '})'}]
+
+    >>> extract_states("Kaggle.State.push(foo);")
+    []
+
+    """
+    decoder = json.JSONDecoder()
+    states = []
+
+    for m in re.finditer(re.escape(STATE_PUSH) + r"\s*", s):
+        try:
+            state, _ = decoder.raw_decode(s, m.end())
+        except ValueError:
+            continue
+        states.append(state)
+
+    return states
+
+
+def iter_dicts(obj):
+    """
+    Yield `obj` and every dict nested in it.
+
+    Examples
+    --------
+    >>> list(iter_dicts({"a": [{"b": 1}, 2]}))
+    [{'a': [{'b': 1}, 2]}, {'b': 1}]
+
+    """
+    if isinstance(obj, dict):
+        yield obj
+        children = obj.values()
+    elif isinstance(obj, list):
+        children = obj
+    else:
+        return
+
+    for child in children:
+        yield from iter_dicts(child)
+
+
+def extract_versions(s):
+    """
+    Extract the versions embedded in the state of a kernel page, i.e. the objects
+    in a `versions` list. Other objects (e.g. the kernel or a run) may have ids
+    and statuses of their own, so they are ignored. Only the fields found for a
+    version are returned, so callers can tell a missing field from
+    a field that is explicitly null. An empty score is treated as missing.
+
+    Examples
+    --------
+    >>> s = (
+    ...     'Kaggle.State.push({"versions":['
+    ...     '{"id":1,"status":"complete","publicScore":"0.1","runTimeSeconds":60},'
+    ...     '{"id":2,"status":"error","publicScore":null},'
+    ...     '{"id":3,"publicScore":"","runTimeSeconds":1e3},'
+    ...     '{"id":4,"title":"foo"}],'
+    ...     '"run":{"id":1,"status":"error"}});'
+    ... )
+    >>> versions = extract_versions(s)
+    >>> versions["1"]
+    {'score': '0.1', 'status': 'complete', 'run_time': '60s'}
+    >>> versions["2"]
+    {'score': None, 'status': 'error'}
+    >>> versions["3"]
+    {'run_time': '1000.0s'}
+    >>> "4" in versions
+    False
+
+    >>> extract_versions("")
+    {}
+
+    """
+    versions = {}
+
+    for state in extract_states(s):
+        for obj in iter_dicts(state):
+            version_list = obj.get("versions")
+            if not isinstance(version_list, list):
+                continue
+
+            for version in version_list:
+                if isinstance(version, dict) and isinstance(version.get("id"), int):
+                    fields = extract_version_fields(version)
+                    if len(fields) > 0:
+                        versions[str(version["id"])] = fields
+
+    return versions
+
+
+def extract_version_fields(version):
+    fields = {}
+
+    if "publicScore" in version:
+        score = version["publicScore"]
+        if score is None:
+            fields["score"] = None
+        elif score != "":
+            fields["score"] = str(score)
+
+    if isinstance(version.get("status"), str):
+        fields["status"] = version["status"]
+
+    run_time = version.get("runTimeSeconds")
+    if isinstance(run_time, (int, float)) and not isinstance(run_time, bool):
+        fields["run_time"] = f"{run_time}s"
+
+    return fields
+
+
 def markdown_to_notebook(md_path, nb_path):
     """
     Examples
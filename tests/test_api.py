@@ -0,0 +1,59 @@
+import pytest
+import requests
+
+from kernel_profiler import api, scraper
+from kernel_profiler.records import Commit, Kernel
+from kernel_profiler.testing.load_test import RequestsDriver, load_page
+from kernel_profiler.testing.server import FakeKaggle, FakeKaggleServer
+
+
+@pytest.fixture
+def kaggle():
+    return FakeKaggle(num_kernels=5, num_versions=10, embed_ratio=0.5)
+
+
+def profile(func, server, **kwargs):
+    # Load the pages with `requests` instead of a browser.
+    return func(
+        "comp",
+        base_url=server.base_url,
+        create_driver=RequestsDriver,
+        load_kernel_list=load_page,
+        load_kernel=load_page,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_iter_competition(kaggle, num_workers):
+    with FakeKaggleServer(kaggle) as server:
+        listing = requests.get(f"{server.base_url}/c/comp/notebooks").text
+        expected = scraper.extract_kernels(scraper.make_soup(listing), server.base_url)
+
+        kernels = list(
+            profile(
+                api.iter_competition,
+                server,
+                max_num_kernels=4,
+                num_workers=num_workers,
+            )
+        )
+
+    assert all(isinstance(kernel, Kernel) for kernel in kernels)
+    # Kernels come back in the order of the listing.
+    assert [kernel.url for kernel in kernels] == [k.url for k in expected[:4]]
+
+    for kernel in kernels:
+        assert len(kernel.commits) > 0
+        assert all(isinstance(commit, Commit) for commit in kernel.commits)
+        assert max(float(c.score) for c in kernel.commits) == float(kernel.best_score)
+
+
+def test_profile_competition(kaggle):
+    with FakeKaggleServer(kaggle) as server:
+        kernels = profile(api.profile_competition, server, max_num_kernels=3)
+        expected = list(profile(api.iter_competition, server, max_num_kernels=3))
+
+    assert isinstance(kernels, list)
+    assert len(kernels) == 3
+    assert kernels == expected
@@ -0,0 +1,224 @@
+import os
+
+import psutil
+import pytest
+import urllib3
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    TimeoutException,
+    WebDriverException,
+)
+
+from kernel_profiler import driver as drv
+
+
+class FakeDriver:
+    def __init__(self):
+        self.closed = False
+        self.cdp_commands = []
+        self.window_size = None
+
+    def quit(self):
+        self.closed = True
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_commands.append((cmd, params))
+
+    def set_window_size(self, width, height):
+        self.window_size = (width, height)
+
+
+def test_get_process_tree_memory():
+    assert drv.get_process_tree_memory(os.getpid()) > 0
+    assert drv.get_process_tree_memory(-1) == 0
+
+
+def test_get_process_memory_does_not_count_shared_pages():
+    proc = psutil.Process(os.getpid())
+    assert 0 < drv.get_process_memory(proc) <= proc.memory_info().rss
+
+
+def test_driver_manager_recycles_after_max_pages():
+    manager = drv.DriverManager(FakeDriver, max_pages=2)
+    drivers = [manager.run(lambda driver: driver) for _ in range(5)]
+
+    assert drivers[0] is drivers[1]
+    assert drivers[1] is not drivers[2]
+    assert drivers[0].closed
+    assert manager.num_restarts == 2
+
+    manager.quit()
+    assert drivers[-1].closed
+
+
+def test_driver_manager_recycles_above_max_memory(monkeypatch):
+    manager = drv.DriverManager(FakeDriver, max_memory_mb=100)
+    monkeypatch.setattr(manager, "memory_usage", lambda: 50 * 1024 ** 2)
+    first = manager.run(lambda driver: driver)
+    assert manager.run(lambda driver: driver) is first
+
+    monkeypatch.setattr(manager, "memory_usage", lambda: 200 * 1024 ** 2)
+    assert manager.run(lambda driver: driver) is not first
+    assert first.closed
+
+
+def test_driver_manager_retries_on_crash():
+    drivers = []
+
+    def open_page(driver):
+        drivers.append(driver)
+        if len(drivers) == 1:
+            raise WebDriverException("tab crashed")
+        return "page"
+
+    with drv.DriverManager(FakeDriver) as manager:
+        assert manager.run(open_page) == "page"
+
+    assert drivers[0] is not drivers[1]
+    assert manager.num_restarts == 1
+
+
+def test_driver_manager_gives_up_after_max_retries():
+    def open_page(driver):
+        raise WebDriverException("tab crashed")
+
+    with drv.DriverManager(FakeDriver, max_retries=1) as manager:
+        with pytest.raises(WebDriverException):
+            manager.run(open_page)
+
+    assert manager.num_restarts == 1
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        WebDriverException("unknown error: session deleted because of page crash"),
+        WebDriverException("disconnected: not connected to DevTools"),
+        urllib3.exceptions.MaxRetryError(None, "/session", "Connection refused"),
+        ConnectionResetError(),
+    ],
+)
+def test_driver_manager_restarts_on_browser_or_chromedriver_crash(error):
+    class CrashedDriver(FakeDriver):
+        def quit(self):
+            # chromedriver is gone, so it can't be asked to quit either.
+            raise error
+
+    drivers = []
+
+    def create_driver():
+        driver = CrashedDriver() if len(drivers) == 0 else FakeDriver()
+        drivers.append(driver)
+        return driver
+
+    def open_page(driver):
+        if isinstance(driver, CrashedDriver):
+            raise error
+        return "page"
+
+    with drv.DriverManager(create_driver) as manager:
+        assert manager.run(open_page) == "page"
+
+    assert manager.num_restarts == 1
+
+
+def test_driver_manager_restarts_on_invalid_session():
+    drivers = []
+
+    def open_page(driver):
+        drivers.append(driver)
+        if len(drivers) == 1:
+            raise InvalidSessionIdException("invalid session id")
+        return "page"
+
+    with drv.DriverManager(FakeDriver) as manager:
+        assert manager.run(open_page) == "page"
+
+    assert manager.num_restarts == 1
+
+
+def test_driver_manager_does_not_restart_on_timeout():
+    drivers = []
+
+    def open_page(driver):
+        drivers.append(driver)
+        if len(drivers) == 1:
+            raise TimeoutException("timed out")
+        return "page"
+
+    with drv.DriverManager(FakeDriver) as manager:
+        with pytest.raises(TimeoutException):
+            manager.run(open_page)
+        assert manager.run(open_page) == "page"
+
+    # The driver is kept for the next page.
+    assert drivers[0] is drivers[1]
+    assert manager.num_restarts == 0
+
+
+def capture_chrome_options(monkeypatch):
+    captured = {}
+
+    def fake_chrome(*args, options=None):
+        captured["options"] = options
+        return FakeDriver()
+
+    monkeypatch.setattr(drv.webdriver, "Chrome", fake_chrome)
+    return captured
+
+
+def test_create_chrome_driver_with_persistent_profile(monkeypatch, tmpdir):
+    captured = capture_chrome_options(monkeypatch)
+    profile_dir = os.path.join(tmpdir, "profile")
+    cache_dir = os.path.join(tmpdir, "cache")
+    drv.create_chrome_driver(user_data_dir=profile_dir, disk_cache_dir=cache_dir)
+
+    args = captured["options"].arguments
+    assert "--headless" in args
+    assert f"--user-data-dir={profile_dir}" in args
+    assert f"--disk-cache-dir={cache_dir}" in args
+
+
+def test_create_chrome_driver_attaches_to_running_browser(monkeypatch):
+    captured = capture_chrome_options(monkeypatch)
+    driver = drv.create_chrome_driver(debugger_address="127.0.0.1:9222")
+
+    options = captured["options"]
+    assert options.debugger_address == "127.0.0.1:9222"
+    assert "--headless" not in options.arguments
+    # The user agent and the window size are applied after attaching.
+    assert driver.cdp_commands == [
+        ("Network.setUserAgentOverride", {"userAgent": drv.USER_AGENT})
+    ]
+    assert driver.window_size == drv.WINDOW_SIZE
+
+
+def test_create_chrome_driver_sets_user_agent(monkeypatch):
+    captured = capture_chrome_options(monkeypatch)
+    driver = drv.create_chrome_driver()
+
+    assert f"--user-agent={drv.USER_AGENT}" in captured["options"].arguments
+    assert "window-size=1920x1080" in captured["options"].arguments
+    assert driver.cdp_commands == []
+
+
+def test_driver_manager_records_metrics():
+    metrics = drv.Metrics()
+    calls = []
+
+    def open_page(driver):
+        calls.append(driver)
+        if len(calls) == 1:
+            raise WebDriverException("chrome not reachable")
+        if len(calls) == 3:
+            raise TimeoutException("timed out")
+
+    with drv.DriverManager(FakeDriver, max_pages=1, metrics=metrics) as manager:
+        manager.run(open_page)
+        with pytest.raises(TimeoutException):
+            manager.run(open_page)
+
+    assert metrics.get("page_errors", error="WebDriverException") == 1
+    assert metrics.get("page_errors", error="TimeoutException") == 1
+    assert metrics.get("driver_restarts", reason="crash") == 1
+    assert metrics.get("driver_restarts", reason="max_pages") == 1
@@ -0,0 +1,179 @@
+import os
+import threading
+
+import pytest
+import requests
+
+from kernel_profiler import metrics as mt, scraper
+from kernel_profiler.testing.server import FakeKaggle, FakeKaggleServer
+
+
+def test_format_labels():
+    assert mt.format_labels({}) == ""
+    assert mt.format_labels({"a": "b", "c": 1}) == '{a="b",c="1"}'
+    assert mt.format_labels({"a": 'x"y\\z'}) == '{a="x\\"y\\\\z"}'
+
+
+def test_metrics_rejects_unknown_names():
+    with pytest.raises(KeyError):
+        mt.Metrics().inc("foo")
+
+
+def test_metrics_render():
+    metrics = mt.Metrics(competition="comp")
+    metrics.inc("commits_skipped", reason="failed")
+    metrics.inc("commits_skipped", 2, reason="failed")
+    metrics.set("last_run_success", 1)
+    metrics.observe("stage_duration_seconds", 1.5, stage="fetch")
+    metrics.observe("stage_duration_seconds", 0.5, stage="fetch")
+
+    lines = metrics.render().splitlines()
+    assert "# TYPE kernel_profiler_commits_skipped_total counter" in lines
+    assert (
+        'kernel_profiler_commits_skipped_total{competition="comp",reason="failed"} 3'
+        in lines
+    )
+    assert 'kernel_profiler_last_run_success{competition="comp"} 1' in lines
+    assert (
+        'kernel_profiler_stage_duration_seconds_sum{competition="comp",stage="fetch"}'
+        " 2.0" in lines
+    )
+    assert (
+        'kernel_profiler_stage_duration_seconds_count{competition="comp",stage="fetch"}'
+        " 2" in lines
+    )
+    assert "# EOF" not in lines
+
+
+def test_metrics_render_openmetrics():
+    metrics = mt.Metrics(competition="comp")
+    metrics.inc("kernels")
+
+    lines = metrics.render(openmetrics=True).splitlines()
+    assert "# TYPE kernel_profiler_kernels counter" in lines
+    assert 'kernel_profiler_kernels_total{competition="comp"} 1' in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_metrics_render_derives_cache_hit_ratio():
+    metrics = mt.Metrics(competition="comp")
+    assert "cache_hit_ratio" not in metrics.render()
+
+    metrics.inc("version_scores", 3, source="embedded")
+    metrics.inc("version_scores", source="fetched")
+
+    lines = metrics.render().splitlines()
+    assert "# TYPE kernel_profiler_version_score_cache_hit_ratio gauge" in lines
+    assert (
+        'kernel_profiler_version_score_cache_hit_ratio{competition="comp"} 0.75'
+        in lines
+    )
+
+
+def test_metrics_are_thread_safe():
+    metrics = mt.Metrics()
+
+    def work():
+        for _ in range(1000):
+            metrics.inc("kernels")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert metrics.get("kernels") == 8000
+
+
+def test_metrics_time():
+    metrics = mt.Metrics()
+    with metrics.time("stage_duration_seconds", stage="write"):
+        pass
+
+    count, total = metrics.get("stage_duration_seconds", stage="write")
+    assert count == 1
+    assert total >= 0
+
+
+def test_write_textfile(tmpdir):
+    metrics = mt.Metrics(competition="comp")
+    metrics.inc("kernels")
+    path = os.path.join(tmpdir, "textfile", "kernel_profiler.prom")
+    mt.write_textfile(metrics, path)
+
+    with open(path) as f:
+        assert f.read() == metrics.render()
+    assert os.listdir(os.path.dirname(path)) == ["kernel_profiler.prom"]
+
+
+def test_serve():
+    metrics = mt.Metrics(competition="comp")
+    metrics.inc("kernels")
+    server = mt.serve(metrics, 0)
+    host, port = server.server_address[:2]
+    url = f"http://{host}:{port}/metrics"
+
+    try:
+        resp = requests.get(url)
+        assert resp.headers["Content-Type"] == mt.PROMETHEUS_CONTENT_TYPE
+        assert resp.text == metrics.render()
+
+        resp = requests.get(url, headers={"Accept": "application/openmetrics-text"})
+        assert resp.headers["Content-Type"] == mt.OPENMETRICS_CONTENT_TYPE
+        assert resp.text == metrics.render(openmetrics=True)
+
+        assert requests.get(f"http://{host}:{port}/foo").status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_scraper_records_metrics():
+    kaggle = FakeKaggle(num_kernels=1, num_versions=50, embed_ratio=0.5)
+    metrics = mt.Metrics(competition="comp")
+
+    with FakeKaggleServer(kaggle) as server:
+        html = requests.get(server.base_url + kaggle.kernel_path(0)).text
+        commits = scraper.extract_page_commits(html, server.base_url, metrics)
+
+    versions = kaggle.versions(0)
+    complete = [v for v in versions if v["status"] == "complete"]
+    num_fetched = sum(1 for v in complete if not v["embedded"])
+
+    assert metrics.get("version_requests", status=200) == num_fetched
+    assert metrics.get("version_scores", source="fetched") == num_fetched
+    assert metrics.get("version_scores", source="embedded") == (
+        len(complete) - num_fetched
+    )
+    assert metrics.get("commits_skipped", 0, reason="failed") == (
+        len(versions) - len(complete)
+    )
+    assert metrics.get("commits_skipped", 0, reason="no_score") == (
+        len(complete) - len(commits)
+    )
+
+
+def test_scraper_counts_failed_requests_apart_from_missing_scores(monkeypatch):
+    monkeypatch.setattr(scraper.time, "sleep", lambda seconds: None)
+    kaggle = FakeKaggle(num_kernels=1, num_versions=50, embed_ratio=0.5)
+    metrics = mt.Metrics(competition="comp")
+
+    with FakeKaggleServer(kaggle) as server:
+        html = requests.get(server.base_url + kaggle.kernel_path(0)).text
+        # Throttle every version page request.
+        server.error_rate = 1.0
+        commits = scraper.extract_page_commits(html, server.base_url, metrics)
+
+    complete = [v for v in kaggle.versions(0) if v["status"] == "complete"]
+    embedded = [v for v in complete if v["embedded"]]
+    num_fetched = len(complete) - len(embedded)
+
+    assert metrics.get("version_requests", status=429) == (
+        num_fetched * (scraper.MAX_FETCH_RETRIES + 1)
+    )
+    assert metrics.get("commits_skipped", 0, reason="request_failed") == num_fetched
+    assert metrics.get("commits_skipped", 0, reason="no_score") == sum(
+        1 for v in embedded if v["score"] is None
+    )
+    assert len(commits) == sum(1 for v in embedded if v["score"] is not None)
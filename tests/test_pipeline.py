@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from kernel_profiler.pipeline import imap_ordered
+
+
+@pytest.mark.parametrize("num_workers", [0, 1, 4])
+def test_imap_ordered_keeps_order(num_workers):
+    def slow_square(x):
+        # Make earlier items finish later.
+        time.sleep(0.01 * (5 - x))
+        return x * x
+
+    actual = list(imap_ordered(slow_square, range(5), num_workers=num_workers))
+    assert actual == [0, 1, 4, 9, 16]
+
+
+def test_imap_ordered_overlaps_producer_and_workers():
+    produced = threading.Event()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def produce():
+        yield 0
+        produced.set()
+        yield from [1, 2]
+
+    def process(x):
+        if x == 0:
+            # The next item is produced while this one is being processed.
+            return produced.wait(timeout=5)
+
+        # Items are processed by several workers at once.
+        barrier.wait()
+        return True
+
+    assert list(imap_ordered(process, produce(), num_workers=2)) == [True] * 3
+
+
+def test_imap_ordered_bounds_pending_items():
+    events = [threading.Event() for _ in range(100)]
+
+    def produce():
+        for i, event in enumerate(events):
+            event.set()
+            yield i
+
+    results = imap_ordered(lambda x: x, produce(), num_workers=1, max_pending=3)
+    assert next(results) == 0
+    assert events[2].wait(timeout=5)
+    # The producer waits for the consumer once 3 items are pending.
+    assert not events[3].wait(timeout=0.2)
+
+    assert next(results) == 1
+    assert events[3].wait(timeout=5)
+    assert not events[4].wait(timeout=0.2)
+    results.close()
+
+
+def test_imap_ordered_advances_iterable_in_one_thread():
+    threads = set()
+
+    def produce():
+        for i in range(10):
+            threads.add(threading.get_ident())
+            yield i
+
+    list(imap_ordered(lambda x: x, produce(), num_workers=4))
+    assert len(threads) == 1
+
+
+def test_imap_ordered_propagates_errors():
+    def fail(x):
+        if x == 2:
+            raise ValueError("worker")
+        return x
+
+    with pytest.raises(ValueError, match="worker"):
+        list(imap_ordered(fail, range(5), num_workers=2))
+
+    def produce():
+        yield 0
+        raise ValueError("producer")
+
+    results = imap_ordered(lambda x: x, produce(), num_workers=2)
+    assert next(results) == 0
+    with pytest.raises(ValueError, match="producer"):
+        next(results)
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_imap_ordered_closes_iterable_when_stopped_early(num_workers):
+    closed = threading.Event()
+
+    def produce():
+        try:
+            for i in range(100):
+                yield i
+        finally:
+            closed.set()
+
+    # Keep a reference so that the iterable isn't closed by garbage collection.
+    it = produce()
+    results = imap_ordered(lambda x: x, it, num_workers=num_workers)
+    assert next(results) == 0
+    results.close()
+    assert closed.is_set()
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_imap_ordered_closes_iterable_when_consumer_raises(num_workers):
+    closed = threading.Event()
+
+    def produce():
+        try:
+            yield from range(100)
+        finally:
+            closed.set()
+
+    it = produce()
+    with pytest.raises(RuntimeError):
+        for _ in imap_ordered(lambda x: x, it, num_workers=num_workers):
+            raise RuntimeError("consumer")
+
+    assert closed.is_set()
@@ -0,0 +1,29 @@
+import pytest
+
+from kernel_profiler.records import Commit, Kernel
+
+
+def test_record_fields_default_to_none():
+    commit = Commit(version="1", score="0.1")
+    assert commit.version == "1"
+    assert commit.score == "0.1"
+    assert commit.url is None
+
+
+def test_record_rejects_unknown_fields():
+    with pytest.raises(TypeError):
+        Commit(foo="bar")
+
+
+def test_record_has_no_instance_dict():
+    kernel = Kernel(name="a")
+    assert not hasattr(kernel, "__dict__")
+
+    with pytest.raises(AttributeError):
+        kernel.foo = "bar"
+
+
+def test_record_equality_and_as_dict():
+    assert Commit(version="1") == Commit(version="1")
+    assert Commit(version="1") != Commit(version="2")
+    assert Commit(version="1").as_dict()["version"] == "1"
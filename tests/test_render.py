@@ -0,0 +1,82 @@
+from kernel_profiler import render
+from kernel_profiler.records import Commit, Kernel
+
+
+def make_kernel(**fields):
+    defaults = {
+        "name": "kernel",
+        "url": "https://www.kaggle.com/author/kernel",
+        "author_name": "Author",
+        "author_id": "author",
+        "author_url": "https://www.kaggle.com/author",
+        "thumbnail_src": "thumbnail.png",
+        "tier_src": "tier.png",
+        "votes": "10",
+        "comments": "2",
+        "last_updated": "1 day ago",
+        "best_score": "0.9",
+        "language": "Python",
+        "medal_src": "",
+        "commits": [
+            Commit(
+                version="1",
+                score="0.8",
+                committed_at="2 days ago",
+                run_time="1.0 m",
+                added="10",
+                deleted="0",
+                url="https://www.kaggle.com/author/kernel?scriptVersionId=1",
+            ),
+            Commit(
+                version="2",
+                score="0.9",
+                committed_at="1 day ago",
+                run_time="1.0 m",
+                added="1",
+                deleted="1",
+                url="https://www.kaggle.com/author/kernel?scriptVersionId=2",
+            ),
+        ],
+    }
+    return Kernel(**{**defaults, **fields})
+
+
+def test_format_kernel_metadata():
+    data, headers = render.format_kernel_metadata(make_kernel())
+    assert headers == ["Key", "Value"]
+    assert dict(data)["Author"] == "[Author](https://www.kaggle.com/author)"
+    assert dict(data)["Medal"] == "-"
+
+    data, _ = render.format_kernel_metadata(make_kernel(medal_src="medal.png"))
+    assert dict(data)["Medal"] == '<img alt="medal" src="medal.png" align="left">'
+
+
+def test_format_commits():
+    data, headers = render.format_commits(make_kernel().commits)
+    assert headers == render.COMMIT_HEADERS
+    assert data[0][:2] == ("1", "0.8")
+    assert data[0][-1].startswith("<a href=")
+
+
+def test_render_kernel():
+    profile = render.render_kernel(make_kernel())
+    kernel_link = "[kernel](https://www.kaggle.com/author/kernel)"
+    assert profile.startswith(f"<br>\n\n# {kernel_link}")
+    assert "### Commit History" in profile
+    assert 'href="https://www.kaggle.com/author"' in profile
+    # The best score is highlighted.
+    assert "#d5fdd5" in profile
+
+
+def test_write_profiles(tmpdir):
+    profiles = [render.render_kernel(make_kernel())]
+    md_path, nb_path = render.write_profiles("comp", profiles, str(tmpdir))
+
+    assert md_path.endswith("comp.md")
+    assert nb_path.endswith("comp.ipynb")
+
+    with open(md_path) as f:
+        content = f.read()
+
+    assert content.startswith(render.DESCRIPTION)
+    assert profiles[0] in content
@@ -0,0 +1,251 @@
+import json
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from kernel_profiler import scraper, utils
+from kernel_profiler.driver import create_chrome_driver
+from kernel_profiler.testing.server import FakeKaggle, FakeKaggleServer
+
+
+def make_row(version_id, status_icon="check-circle", run_time="60s"):
+    return f"""
+<div>
+  <a><svg data-icon="{status_icon}"></svg></a>
+  <a href="/user/kernel?scriptVersionId={version_id}">Version {version_id}</a>
+  <a></a>
+  <a>{run_time}</a>
+  <span>1 day ago</span>
+  <span>+1</span>
+  <span>-0</span>
+</div>
+"""
+
+
+def make_kernel_page(rows, versions):
+    state = json.dumps({"kernel": {"versions": versions}}, separators=(",", ":"))
+    return f"""
+<html>
+<head><script>Kaggle.State.push({state});</script></head>
+<body>
+<table class="VersionsPaneContent_IdeVersionsTable-abc">
+  <tbody>{"".join(rows)}</tbody>
+</table>
+</body>
+</html>
+"""
+
+
+def test_extract_commits_uses_embedded_versions(monkeypatch):
+    fetched = []
+
+    def fetch_public_score(url, metrics=None):
+        fetched.append(url)
+        return "0.5"
+
+    monkeypatch.setattr(scraper, "fetch_public_score", fetch_public_score)
+
+    rows = [make_row(1), make_row(2), make_row(3), make_row(4, "times-circle")]
+    versions = [
+        {"id": 1, "status": "complete", "publicScore": "0.1"},
+        {"id": 2, "status": "complete", "publicScore": None},
+        # The score of version 3 is missing, so it's fetched from its own page.
+        {"id": 3, "status": "complete"},
+    ]
+    soup = scraper.make_soup(make_kernel_page(rows, versions))
+    commits = scraper.extract_commits(soup)
+
+    assert [(c.version, c.score) for c in commits] == [("1", "0.1"), ("3", "0.5")]
+    assert fetched == [scraper.TOP_URL + "/user/kernel?scriptVersionId=3"]
+
+
+def test_extract_commits_skips_failed_embedded_versions(monkeypatch):
+    monkeypatch.setattr(scraper, "fetch_public_score", lambda url, metrics=None: "0.5")
+
+    rows = [make_row(1), make_row(2, run_time="")]
+    versions = [
+        {"id": 1, "status": "error"},
+        {"id": 2, "status": "complete", "runTimeSeconds": 3600},
+    ]
+    soup = scraper.make_soup(make_kernel_page(rows, versions))
+    commits = scraper.extract_commits(soup)
+
+    assert len(commits) == 1
+    assert commits[0].version == "2"
+    assert commits[0].run_time == "1.0 h"
+
+
+class FakeDriver:
+    page_source = "<html></html>"
+
+    def execute_script(self, script):
+        return {"script": script}
+
+
+def test_read_page():
+    driver = FakeDriver()
+    assert scraper.read_page(driver, "return 1;") == driver.page_source
+    assert scraper.read_page(driver, "return 1;", "script") == {"script": "return 1;"}
+
+
+def test_iter_kernels_with_injected_loaders():
+    kaggle = FakeKaggle(num_kernels=3)
+    drivers = []
+    urls = []
+
+    class NullDriver:
+        def quit(self):
+            pass
+
+    def create_driver():
+        drivers.append(NullDriver())
+        return drivers[-1]
+
+    def load_kernel_list(driver, comp_url, extract_mode="html"):
+        urls.append(comp_url)
+        return kaggle.render_listing()
+
+    def load_kernel(driver, kernel_url, extract_mode="html"):
+        urls.append(kernel_url)
+        return "<html></html>"
+
+    pages = list(
+        scraper.iter_kernels(
+            "comp",
+            2,
+            base_url="http://localhost:8000/",
+            create_driver=create_driver,
+            load_kernel_list=load_kernel_list,
+            load_kernel=load_kernel,
+        )
+    )
+
+    assert len(drivers) == 1
+    assert [page for page, _ in pages] == ["<html></html>"] * 2
+    # The trailing slash of the base URL is dropped.
+    assert urls[0] == "http://localhost:8000/c/comp/notebooks"
+    assert all("//" not in url[len("http://") :] for url in urls)
+    assert urls[1:] == [kernel.url for _, kernel in pages]
+
+
+@pytest.mark.parametrize(
+    "limits", [{"max_pages_per_driver": 10}, {"max_driver_memory": 1024}]
+)
+def test_iter_kernels_rejects_limits_when_attaching(limits):
+    kernels = scraper.iter_kernels(
+        "comp", 1, driver_options={"debugger_address": "127.0.0.1:9222"}, **limits
+    )
+    with pytest.raises(ValueError):
+        next(kernels)
+
+
+def test_extract_commits_without_progress_bar(monkeypatch, capsys):
+    monkeypatch.setattr(scraper, "fetch_public_score", lambda url, metrics=None: "0.5")
+    soup = scraper.make_soup(make_kernel_page([make_row(1), make_row(2)], []))
+
+    assert len(scraper.extract_commits(soup, progress=False)) == 2
+    assert capsys.readouterr().err == ""
+
+    assert len(scraper.extract_commits(soup)) == 2
+    assert "2/2" in capsys.readouterr().err
+
+
+def test_extract_page_kernels_from_script_output():
+    kaggle = FakeKaggle(num_kernels=4)
+    soup = scraper.make_soup(kaggle.render_listing())
+
+    # What `KERNEL_CARDS_SCRIPT` returns.
+    cards = [
+        scraper.extract_kernel_card(ker)
+        for ker in soup.select("div.block-link--bordered")
+    ]
+
+    expected = scraper.extract_page_kernels(str(soup))
+    assert len(expected) == 4
+    assert scraper.extract_page_kernels(cards) == expected
+
+
+def test_extract_page_commits_from_script_output(monkeypatch):
+    monkeypatch.setattr(scraper, "fetch_public_score", lambda url, metrics=None: "0.5")
+
+    rows = [make_row(1), make_row(2), make_row(3, "times-circle")]
+    versions = [{"id": 1, "status": "complete", "publicScore": "0.1"}]
+    html = make_kernel_page(rows, versions)
+    soup = scraper.make_soup(html)
+
+    # What `VERSIONS_SCRIPT` returns.
+    page = {
+        "rows": [
+            scraper.extract_version_row(row) for row in soup.select("table tbody > div")
+        ],
+        "states": [
+            script.string
+            for script in soup.find_all("script")
+            if utils.is_state_script(script.string)
+        ],
+    }
+
+    expected = scraper.extract_page_commits(html)
+    assert [(c.version, c.score) for c in expected] == [("1", "0.1"), ("2", "0.5")]
+    assert scraper.extract_page_commits(page) == expected
+
+
+def test_missing_card_fields_fail_the_same_way_in_both_modes():
+    soup = scraper.make_soup(FakeKaggle(num_kernels=1).render_listing())
+    # Drop the language.
+    soup.select("span.tooltip-container")[2].decompose()
+
+    card = scraper.extract_kernel_card(soup.select("div.block-link--bordered")[0])
+    assert card["language"] is None
+
+    for page in [str(soup), [card]]:
+        with pytest.raises(ValueError, match="Missing fields in kernel card: language"):
+            scraper.extract_page_kernels(page)
+
+
+def test_missing_row_fields_fail_the_same_way_in_both_modes():
+    html = make_kernel_page([make_row(1).replace("<a>60s</a>", "")], [])
+    soup = scraper.make_soup(html)
+    rows = [scraper.extract_version_row(row) for row in soup.select("tbody > div")]
+    assert rows[0]["run_time"] is None
+
+    for page in [html, {"rows": rows, "states": []}]:
+        with pytest.raises(ValueError, match="version row: run_time"):
+            scraper.extract_page_commits(page)
+
+    # The versions table itself is missing.
+    for page in ["<html></html>", {"rows": None, "states": []}]:
+        with pytest.raises(ValueError, match="versions table"):
+            scraper.extract_page_commits(page)
+
+
+@pytest.fixture(scope="module")
+def chrome():
+    try:
+        driver = create_chrome_driver()
+    except WebDriverException as e:
+        pytest.skip(f"Chrome is not available: {e}")
+
+    yield driver
+    driver.quit()
+
+
+def test_script_mode_matches_html_mode_in_chrome(chrome):
+    # Run `KERNEL_CARDS_SCRIPT` and `VERSIONS_SCRIPT` in a real browser.
+    kaggle = FakeKaggle(num_kernels=3, num_versions=10, embed_ratio=0.5)
+    results = {}
+
+    with FakeKaggleServer(kaggle) as server:
+        base_url = server.base_url
+        comp_url = f"{base_url}/c/comp/notebooks"
+
+        for extract_mode in ["html", "script"]:
+            list_page = scraper.open_kernel_list(chrome, comp_url, extract_mode)
+            kernels = scraper.extract_page_kernels(list_page, base_url)
+            kernel_page = scraper.open_kernel(chrome, kernels[0].url, extract_mode)
+            commits = scraper.extract_page_commits(kernel_page, base_url)
+            results[extract_mode] = (kernels, commits)
+
+    assert len(results["script"][0]) == 3
+    assert len(results["script"][1]) > 0
+    assert results["script"] == results["html"]
@@ -0,0 +1,85 @@
+import pytest
+import requests
+
+from kernel_profiler import scraper
+from kernel_profiler.testing.server import FakeKaggle, FakeKaggleServer
+
+
+@pytest.fixture
+def kaggle():
+    return FakeKaggle(num_kernels=3, num_versions=20, embed_ratio=0.5)
+
+
+def test_fake_kaggle_is_deterministic(kaggle):
+    other = FakeKaggle(num_kernels=3, num_versions=20, embed_ratio=0.5)
+    assert kaggle.versions(0) == other.versions(0)
+    assert kaggle.versions(0) != kaggle.versions(1)
+
+
+def test_scraper_extracts_fake_pages(kaggle):
+    with FakeKaggleServer(kaggle) as server:
+        base_url = server.base_url
+        html = requests.get(f"{base_url}/c/comp/notebooks").text
+        kernels = scraper.extract_kernels(scraper.make_soup(html), base_url)
+
+        assert len(kernels) == 3
+        # Kernels are sorted by the best score.
+        assert kernels == sorted(kernels, key=lambda k: -float(k.best_score))
+
+        kernel = kernels[0]
+        idx = int(kernel.url.rsplit("-", 1)[1])
+        # Links point to the server rather than Kaggle.
+        assert kernel.author_url == f"{base_url}/user{idx}"
+        html = requests.get(kernel.url).text
+        commits = scraper.extract_commits(scraper.make_soup(html), base_url)
+
+    expected = [
+        v
+        for v in reversed(kaggle.versions(idx))
+        if v["status"] == "complete" and v["score"] is not None
+    ]
+    assert [c.score for c in commits] == [v["score"] for v in expected]
+    assert max(float(c.score) for c in commits) == float(kernel.best_score)
+
+    # Only the scores that are not embedded in the kernel page are fetched.
+    num_fetched = sum(
+        1
+        for v in kaggle.versions(idx)
+        if v["status"] == "complete" and not v["embedded"]
+    )
+    assert server.stats[("version", 200)] == num_fetched
+
+
+def test_server_throttles_requests(kaggle):
+    with FakeKaggleServer(kaggle, error_rate=1.0) as server:
+        resp = requests.get(f"{server.base_url}/c/comp/notebooks")
+
+    assert resp.status_code == 429
+    assert server.stats[("listing", 429)] == 1
+
+
+def test_server_returns_404_for_unknown_pages(kaggle):
+    with FakeKaggleServer(kaggle) as server:
+        assert requests.get(f"{server.base_url}/foo").status_code == 404
+        assert requests.get(f"{server.base_url}/user9/kernel-9").status_code == 404
+
+
+def test_fetch_public_score_retries_throttled_requests(kaggle, monkeypatch):
+    delays = []
+    monkeypatch.setattr(scraper.time, "sleep", delays.append)
+    version = kaggle.versions(0)[0]
+    path = f"{kaggle.kernel_path(0)}?scriptVersionId={version['id']}"
+
+    with FakeKaggleServer(kaggle, error_rate=1.0) as server:
+        with pytest.raises(requests.HTTPError):
+            scraper.fetch_public_score(server.base_url + path, max_retries=2)
+
+    assert server.stats[("version", 429)] == 3
+    # `Retry-After` is honoured.
+    assert delays == [1.0, 1.0]
+
+    with FakeKaggleServer(kaggle, error_rate=0.5, seed=1) as server:
+        score = scraper.fetch_public_score(server.base_url + path, max_retries=10)
+
+    assert score == version["score"]
+    assert server.stats[("version", 200)] == 1
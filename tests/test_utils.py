@@ -1,3 +1,4 @@
+import json
 import os
 
 from kernel_profiler import utils
@@ -38,3 +39,67 @@ def test_round_run_time():
     assert utils.round_run_time("60s") == "1.0 m"
     assert utils.round_run_time("3599s") == "60.0 m"
     assert utils.round_run_time("3600s") == "1.0 h"
+
+
+def test_extract_version_id():
+    assert utils.extract_version_id("/a/b?scriptVersionId=123") == "123"
+    assert utils.extract_version_id("/a/b") is None
+
+
+def test_extract_states():
+    s = 'Kaggle.State.push({"a":"{"}); Kaggle.State.push( [1] );'
+    assert utils.extract_states(s) == [{"a": "{"}, [1]]
+    assert utils.extract_states("Kaggle.State.push({);") == []
+
+
+def test_extract_versions():
+    def push(*versions):
+        return f"Kaggle.State.push({json.dumps({'versions': versions})});"
+
+    s = push(
+        {"id": 1, "status": "complete", "publicScore": "0.1", "runTimeSeconds": 1.5}
+    )
+    assert utils.extract_versions(s) == {
+        "1": {"score": "0.1", "status": "complete", "run_time": "1.5s"}
+    }
+    assert utils.extract_versions(push({"id": 1, "publicScore": None})) == {
+        "1": {"score": None}
+    }
+    assert utils.extract_versions(push({"id": 1, "title": "foo"})) == {}
+
+
+def test_extract_versions_treats_empty_score_as_missing():
+    s = (
+        'Kaggle.State.push({"versions":['
+        '{"id":1,"publicScore":"","status":"complete"}]});'
+    )
+    assert utils.extract_versions(s) == {"1": {"status": "complete"}}
+
+
+def test_extract_versions_nested():
+    state = {
+        "kernel": {
+            "id": 10,
+            "title": "a } in a string",
+            "versions": [
+                {"id": 1, "publicScore": "0.1", "author": {"id": 99, "name": "x"}},
+                {"id": 2, "runTimeSeconds": 1e3},
+            ],
+        }
+    }
+    s = f"Kaggle.State.push({json.dumps(state)});"
+    assert utils.extract_versions(s) == {
+        "1": {"score": "0.1"},
+        "2": {"run_time": "1000.0s"},
+    }
+
+
+def test_extract_versions_ignores_objects_outside_versions():
+    state = {
+        "kernel": {"id": 1, "status": "complete"},
+        "run": {"id": 1, "status": "error", "publicScore": None},
+        "versions": [{"id": 1, "status": "complete", "publicScore": "0.1"}],
+    }
+    s = f"Kaggle.State.push({json.dumps(state)});"
+    assert utils.extract_versions(s) == {"1": {"score": "0.1", "status": "complete"}}
+    assert utils.extract_versions('Kaggle.State.push({"id":1,"status":"error"});') == {}